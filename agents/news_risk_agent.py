@@ -1,22 +1,57 @@
 """Agent for analyzing news-based dynamic risks."""
 
-import google.generativeai as genai
+import contextvars
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
 from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-from config import GEMINI_API_KEY, HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD
-from utils.news_scraper import NewsScraper
+from config import (
+    HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD,
+    NEWS_MAX_SCORED_ITEMS, NEWS_SCORING_BATCH_SIZE, NEWS_SCORING_MAX_PARALLEL, NEWS_HEADLINE_MEMO_SIZE,
+    NEWS_RELEVANCE_MIN_RATIO, NEWS_PROFILE_TERM_WEIGHT
+)
+from utils.headline_dedup import cluster_headlines
+from utils.headline_ranker import HeadlineRanker
+from utils.keyword_matcher import get_keyword_matcher
+from utils.llm_cache import CachedGenerativeModel
+from utils.llm_client import get_llm_registry
+from utils.news_store import get_news_store
 
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+# Keywords every project's news is filtered on
+BASE_NEWS_KEYWORDS = ("tariff", "exchange rate", "currency", "import ban", "export ban")
 
 class NewsRiskAgent:
     def __init__(self):
-        """Initialize the news risk analysis agent."""
-        self.news_scraper = NewsScraper()
-        self.llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro", google_api_key=GEMINI_API_KEY)
+        """Initialize the news risk analysis agent.
+        
+        The LLM client, its response cache and the CrewAI agent are created on first use.
+        """
+        self.news_store = get_news_store()
+        self.news_scraper = self.news_store.scraper
+        
+        # Headline scores by (profile, title, source, source count), oldest first
+        self._headline_scores = {}
+        self._headline_lock = threading.Lock()
+        
+        # Ranker for the current news snapshot, with the lists it was built from
+        self._ranker = (None, None, None)
+        
+    @cached_property
+    def model(self):
+        """Cached, rate-limited Gemini model, created on first use."""
+        return CachedGenerativeModel(get_llm_registry().get_model())
         
-        # Create CrewAI agent
-        self.agent = Agent(
+    @cached_property
+    def llm(self):
+        """Shared LangChain chat model from the LLM client registry."""
+        return get_llm_registry().get_chat_model()
+        
+    @cached_property
+    def agent(self):
+        """CrewAI agent, created on first use."""
+        return Agent(
             role="News Risk Analyzer",
             goal="Monitor and analyze global news for project-relevant risk factors",
             backstory="I am an expert in identifying emerging risks from global news sources that might impact ongoing projects.",
@@ -25,10 +60,10 @@ class NewsRiskAgent:
             allow_delegation=False
         )
         
-    def get_relevant_news(self, project_data):
-        """Gather news relevant to the project."""
+    def build_keywords(self, project_data):
+        """Build the news keyword list for a project."""
         # Define keywords based on project data
-        keywords = ["tariff", "exchange rate", "currency", "import ban", "export ban"]
+        keywords = list(BASE_NEWS_KEYWORDS)
         
         # Add location-specific keywords
         if project_data.get("project_location"):
@@ -38,84 +73,246 @@ class NewsRiskAgent:
         if project_data.get("technology"):
             keywords.append(project_data["technology"])
             
-        # Scrape economic and geopolitical news
-        economic_news = self.news_scraper.get_economic_news()
-        geopolitical_news = self.news_scraper.get_geopolitical_news()
+        return keywords
         
-        # Filter relevant news
-        relevant_economic = self.news_scraper.filter_relevant_news(economic_news, keywords)
-        relevant_geopolitical = self.news_scraper.filter_relevant_news(geopolitical_news, keywords)
+    def get_relevant_news(self, project_data):
+        """Gather news relevant to the project."""
+        # Read economic and geopolitical news from the shared snapshot
+        economic_news, geopolitical_news = self.news_store.get_news()
         
-        return relevant_economic + relevant_geopolitical
+        # Filter relevant news with a compiled matcher for this keyword set
+        matcher = get_keyword_matcher(self.build_keywords(project_data))
+        return matcher.filter(economic_news) + matcher.filter(geopolitical_news)
         
-    def analyze_news_risks(self, project_data):
-        """Analyze dynamic risks from news for a project."""
-        # Get relevant news
-        relevant_news = self.get_relevant_news(project_data)
+    def relevance_keywords(self, project_data):
+        """Return {keyword: weight} for ranking headlines; the project's own location and technology weigh more."""
+        weights = dict.fromkeys(self.build_keywords(project_data), 1.0)
+        for field in ("project_location", "technology"):
+            if project_data.get(field):
+                weights[project_data[field]] = NEWS_PROFILE_TERM_WEIGHT
+        return weights
         
-        if not relevant_news:
-            return {
-                "risk_factors": [],
-                "risk_score": 0,
-                "risk_level": "Low",
-                "news_items": []
-            }
+    def get_headline_ranker(self):
+        """Return a HeadlineRanker over the current news snapshot, rebuilt only when the snapshot changes."""
+        economic_news, geopolitical_news = self.news_store.get_news()
+        cached_economic, cached_geopolitical, ranker = self._ranker
+        if economic_news is cached_economic and geopolitical_news is cached_geopolitical:
+            return ranker
             
-        # Analyze news significance with the LLM
+        ranker = HeadlineRanker([news["title"] for news in economic_news + geopolitical_news])
+        self._ranker = (economic_news, geopolitical_news, ranker)
+        return ranker
+        
+    def _build_batch_prompt(self, project_data, news_batch):
+        """Build a prompt that scores a batch of headlines in one request."""
+        headlines = "\n".join([
+            f'{i}. "{news["title"]}" from {news["source"]}'
+            + (f' (reported by {news["source_count"]} outlets)' if news.get("source_count", 1) > 1 else "")
+            for i, news in enumerate(news_batch, start=1)
+        ])
+
+        return f"""
+        Analyze the following news headlines and determine the risk impact of each one on a project with these details:
+        - Project location: {project_data.get('project_location', 'Unknown')}
+        - Project size: {project_data.get('project_size', 'Unknown')}
+        - Technology: {project_data.get('technology', 'Unknown')}
+        
+        News headlines:
+        {headlines}
+        
+        Assign each headline a risk score from 0-100, where:
+        - 0-39: Low risk impact
+        - 40-69: Medium risk impact
+        - 70-100: High risk impact
+        
+        Respond with only a JSON array containing one object per headline, in this format:
+        [{{"index": 1, "score": 0-100, "risk_level": "Low/Medium/High", "explanation": "Brief explanation"}}]
+        """
+
+    @staticmethod
+    def _load_batch_json(response_text):
+        """Return the JSON array in a batched LLM response; raises ValueError if there is none."""
+        text = response_text.strip()
+
+        # Strip a markdown code fence if the model added one
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1] if "\n" in text else ""
+            text = text.rsplit("```", 1)[0]
+
+        results = json.loads(text)
+        if not isinstance(results, list):
+            raise ValueError("expected a JSON array")
+        return results
+
+    @classmethod
+    def _is_valid_batch_response(cls, response_text):
+        """Return True if a batched LLM response parses, so it is safe to cache."""
+        try:
+            cls._load_batch_json(response_text)
+        except ValueError:
+            return False
+        return True
+
+    def _parse_batch_response(self, response_text, news_batch):
+        """Parse a batched LLM response into news risk factors."""
+        try:
+            results = self._load_batch_json(response_text)
+        except ValueError as e:
+            print(f"Error parsing LLM response for news risk batch: {e}")
+            return []
+
         news_risks = []
-        total_score = 0
-        
-        for news in relevant_news[:10]:  # Limit to top 10 news items
-            # Create a prompt for the LLM to evaluate news significance
-            prompt = f"""
-            Analyze the following news headline and determine its risk impact on a project with these details:
-            - Project location: {project_data.get('project_location', 'Unknown')}
-            - Project size: {project_data.get('project_size', 'Unknown')}
-            - Technology: {project_data.get('technology', 'Unknown')}
+        for result in results:
+            try:
+                news = news_batch[int(result["index"]) - 1]
+                score = int(result["score"])
+            except (IndexError, KeyError, TypeError, ValueError) as e:
+                print(f"Error parsing LLM response for news risk: {e}")
+                continue
+
+            news_risks.append({
+                "name": "News Risk",
+                "value": news['title'],
+                "score": score,
+                "risk_level": str(result.get("risk_level", "")).strip(),
+                "description": str(result.get("explanation", "")).strip(),
+                "source": news['source'],
+                "source_count": news.get('source_count', 1),
+                "link": news.get('link', '')
+            })
+
+        return news_risks
+
+    def _score_news_batch(self, project_data, news_batch):
+        """Score a batch of headlines with a single LLM request."""
+        prompt = self._build_batch_prompt(project_data, news_batch)
+        response = self.model.generate_content(prompt, validate=self._is_valid_batch_response)
+        return self._parse_batch_response(response.text, news_batch)
+
+    def score_news_items(self, project_data, news_items):
+        """Score headlines, reusing earlier scores for the same project profile.
+        
+        Only headlines not scored before are sent to the LLM, in batches with up
+        to NEWS_SCORING_MAX_PARALLEL requests at once.
+        """
+        profile = self.profile_key(project_data)
+        
+        # How many outlets carried a story is part of what the LLM scores
+        def headline_key(news):
+            return (news["title"], news["source"], news.get("source_count", 1))
             
-            News headline: "{news['title']}" from {news['source']}
+        with self._headline_lock:
+            known = {
+                headline_key(news): self._headline_scores.get((profile,) + headline_key(news))
+                for news in news_items
+            }
+        missing = [news for news in news_items if known[headline_key(news)] is None]
+        
+        for risk in self._score_uncached_news(project_data, missing):
+            known[(risk["value"], risk["source"], risk["source_count"])] = risk
             
-            Assign a risk score from 0-100, where:
-            - 0-39: Low risk impact
-            - 40-69: Medium risk impact
-            - 70-100: High risk impact
+        with self._headline_lock:
+            for key, risk in known.items():
+                if risk is not None:
+                    self._headline_scores[(profile,) + key] = risk
+            while len(self._headline_scores) > NEWS_HEADLINE_MEMO_SIZE:
+                del self._headline_scores[next(iter(self._headline_scores))]
+                
+        return [
+            dict(known[headline_key(news)])
+            for news in news_items if known[headline_key(news)] is not None
+        ]
+        
+    def clear_headline_scores(self):
+        """Forget memoized headline scores so the next analysis scores every headline again."""
+        with self._headline_lock:
+            self._headline_scores.clear()
             
-            Provide your assessment in this format:
-            Score: [0-100]
-            Risk level: [Low/Medium/High]
-            Explanation: [Brief explanation]
-            """
+    def _score_uncached_news(self, project_data, news_items):
+        """Score headlines in batches, dispatching up to NEWS_SCORING_MAX_PARALLEL requests at once.
+        
+        If any batch request fails the first error is raised once all batches
+        have finished, so a partial score never passes for the news risk.
+        """
+        batches = [
+            news_items[i:i + NEWS_SCORING_BATCH_SIZE]
+            for i in range(0, len(news_items), NEWS_SCORING_BATCH_SIZE)
+        ]
+        if not batches:
+            return []
+
+        # Create the model here rather than in the racing batch threads
+        self.model
+
+        news_risks = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(NEWS_SCORING_MAX_PARALLEL, len(batches))) as executor:
+            # Copy the context so LLM spans nest under the caller's span
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._score_news_batch, project_data, batch)
+                for batch in batches
+            ]
+            for future in futures:
+                try:
+                    news_risks.extend(future.result())
+                except Exception as e:
+                    print(f"Error scoring news batch: {e}")
+                    errors.append(e)
+
+        if errors:
+            raise errors[0]
+        return news_risks
+
+    @staticmethod
+    def profile_key(project_data):
+        """Return the project attributes that news relevance and scoring depend on."""
+        return (
+            project_data.get("project_location"),
+            project_data.get("project_size"),
+            project_data.get("technology")
+        )
+        
+    def analyze_news_risks(self, project_data, relevant_news=None):
+        """Analyze dynamic risks from news for a project.
+        
+        Pass relevant_news to reuse headlines that were already fetched and filtered.
+        Near-duplicate headlines are collapsed first, so "news_items" holds one
+        representative per story with the outlets that carried it in "sources".
+        Stories are then ranked by BM25 relevance to the project ("relevance"),
+        and only the NEWS_MAX_SCORED_ITEMS best scoring at least
+        NEWS_RELEVANCE_MIN_RATIO of the top story's relevance are sent to the LLM.
+        
+        "snapshot_fetched_at" identifies the news snapshot the result is
+        based on, so callers can tell when it is out of date.
+        """
+        # Taken before the news is read, so a refresh meanwhile makes the result look older, never newer
+        snapshot_fetched_at = self.news_store.fetched_at
+        
+        # Get relevant news
+        if relevant_news is None:
+            relevant_news = self.get_relevant_news(project_data)
             
-            # Get LLM response
-            model = genai.GenerativeModel('gemini-1.5-pro')
-            response = model.generate_content(prompt)
-            response_text = response.text
+        # One representative per story, so reworded copies do not use up scoring slots
+        relevant_news = cluster_headlines(relevant_news)
+        
+        # Spend LLM calls only on the stories most relevant to this project
+        relevant_news, selected_news = self.get_headline_ranker().rank(
+            self.relevance_keywords(project_data), relevant_news,
+            top_k=NEWS_MAX_SCORED_ITEMS, min_ratio=NEWS_RELEVANCE_MIN_RATIO
+        )
+        
+        if not selected_news:
+            return {
+                "risk_factors": [],
+                "risk_score": 0,
+                "risk_level": "Low",
+                "news_items": relevant_news,
+                "snapshot_fetched_at": snapshot_fetched_at
+            }
             
-            # Parse the response
-            try:
-                lines = response_text.strip().split('\n')
-                score_line = [line for line in lines if line.startswith("Score:")][0]
-                level_line = [line for line in lines if line.startswith("Risk level:")][0]
-                explanation_lines = [line for line in lines if line.startswith("Explanation:")]
-                
-                score = int(score_line.split("Score:")[1].strip().split()[0])
-                risk_level = level_line.split("Risk level:")[1].strip()
-                explanation = explanation_lines[0].split("Explanation:")[1].strip() if explanation_lines else ""
-                
-                news_risks.append({
-                    "name": "News Risk",
-                    "value": news['title'],
-                    "score": score,
-                    "risk_level": risk_level,
-                    "description": explanation,
-                    "source": news['source'],
-                    "link": news.get('link', '')
-                })
-                
-                total_score += score
-                
-            except (IndexError, ValueError) as e:
-                print(f"Error parsing LLM response for news risk: {e}")
+        # Analyze news significance with the LLM in batches
+        news_risks = self.score_news_items(project_data, selected_news)
+        total_score = sum(risk["score"] for risk in news_risks)
         
         # Calculate average risk score
         avg_score = total_score / len(news_risks) if news_risks else 0
@@ -132,5 +329,6 @@ class NewsRiskAgent:
             "risk_factors": news_risks,
             "risk_score": round(avg_score, 2),
             "risk_level": risk_level,
-            "news_items": relevant_news
+            "news_items": relevant_news,
+            "snapshot_fetched_at": snapshot_fetched_at
         }
\ No newline at end of file
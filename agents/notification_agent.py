@@ -1,22 +1,40 @@
 """Agent for sending risk notifications."""
 
-import google.generativeai as genai
+import threading
+from datetime import datetime
+from functools import cached_property
+
 from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-from config import GEMINI_API_KEY, HIGH_RISK_THRESHOLD
+from config import HIGH_RISK_THRESHOLD, ALERT_DIGEST_INTERVAL
+from utils.alert_ledger import AlertLedger, risk_fingerprint
 from utils.email_sender import EmailSender
-
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+from utils.llm_client import get_llm_registry
 
 class NotificationAgent:
-    def __init__(self):
-        """Initialize the notification agent."""
-        self.email_sender = EmailSender()
-        self.llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro", google_api_key=GEMINI_API_KEY)
+    def __init__(self, email_sender=None, ledger=None, digest_interval=ALERT_DIGEST_INTERVAL):
+        """Initialize the notification agent.
+        
+        Alerts already sent within the ledger's suppression window are skipped,
+        and each recipient gets at most one email per digest_interval seconds;
+        alerts raised in between are folded into the next digest.
+        """
+        self.email_sender = email_sender or EmailSender()
+        self.ledger = ledger or AlertLedger()
+        self.digest_interval = digest_interval
+        
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        
+    @cached_property
+    def llm(self):
+        """Shared LangChain chat model from the LLM client registry."""
+        return get_llm_registry().get_chat_model()
         
-        # Create CrewAI agent
-        self.agent = Agent(
+    @cached_property
+    def agent(self):
+        """CrewAI agent, created on first use."""
+        return Agent(
             role="Risk Notification Manager",
             goal="Notify project stakeholders of high-risk situations",
             backstory="I am responsible for ensuring that project managers are promptly informed of high-risk situations that require immediate attention.",
@@ -26,13 +44,18 @@ class NotificationAgent:
         )
         
     def handle_risk_notification(self, project_data, risk_analysis):
-        """Handle risk notification based on risk level."""
+        """Handle risk notification based on risk level.
+        
+        "notification_queued" says whether an alert was handed to the email
+        queue ("delivery_status" "queued") or held for the next digest
+        ("batched"); whether it arrived is in get_delivery_status.
+        """
         # Check if risk level is high
         if risk_analysis.get("risk_level") == "High":
             return self._send_high_risk_notification(project_data, risk_analysis)
         else:
             return {
-                "notification_sent": False,
+                "notification_queued": False,
                 "reason": f"Risk level is {risk_analysis.get('risk_level')}, notification threshold not met"
             }
             
@@ -43,7 +66,7 @@ class NotificationAgent:
         
         if not project_manager_email:
             return {
-                "notification_sent": False,
+                "notification_queued": False,
                 "reason": "Project manager email not provided"
             }
             
@@ -60,23 +83,94 @@ class NotificationAgent:
                 "description": factor.get("description", "No description available")
             })
         
-        # Send email notification
-        notification_success = self.email_sender.send_risk_notification(
-            recipient=project_manager_email,
-            project_name=project_name,
-            risk_score=risk_analysis.get("risk_score", 0),
-            risk_factors=email_risk_factors
-        )
-        
-        if notification_success:
+        if not self.email_sender.is_configured():
             return {
-                "notification_sent": True,
-                "recipient": project_manager_email,
-                "project": project_name,
-                "timestamp": genai.utils.get_current_time()
+                "notification_queued": False,
+                "reason": "Email credentials not configured"
             }
-        else:
-            return {
-                "notification_sent": False,
-                "reason": "Failed to send email notification"
-            }
\ No newline at end of file
+            
+        # Skip alerts that say nothing new since the last one for this project
+        project_id = str(project_data.get("project_id") or project_name)
+        fingerprint = risk_fingerprint(risk_analysis)
+        with self._flush_lock:
+            if self.ledger.is_duplicate(project_id, fingerprint):
+                return {
+                    "notification_queued": False,
+                    "suppressed": True,
+                    "reason": "Same alert already sent for this project within the suppression window"
+                }
+                
+            # Add the alert to the recipient's digest
+            self.ledger.add_pending(project_manager_email, project_id, fingerprint, {
+                "project_name": project_name,
+                "risk_score": risk_analysis.get("risk_score", 0),
+                "risk_factors": email_risk_factors
+            })
+            
+        # Send it now if the recipient has not had an email this interval
+        delivery_ids = self.flush_digests(recipient=project_manager_email)
+        self._start_flusher()
+        
+        return {
+            "notification_queued": True,
+            "delivery_id": delivery_ids.get(project_manager_email),
+            "delivery_status": "queued" if project_manager_email in delivery_ids else "batched",
+            "recipient": project_manager_email,
+            "project": project_name,
+            "timestamp": datetime.now().isoformat(timespec="seconds")
+        }
+        
+    def flush_digests(self, recipient=None, force=False):
+        """Queue one email per recipient whose digest is due; returns {recipient: delivery_id}.
+        
+        With force=True every pending alert is sent regardless of the interval.
+        """
+        delivery_ids = {}
+        with self._flush_lock:
+            interval = 0 if force else self.digest_interval
+            for due_recipient in self.ledger.due_recipients(interval):
+                if recipient is not None and due_recipient != recipient:
+                    continue
+                alerts = self.ledger.claim_digest(due_recipient)
+                if not alerts:
+                    continue
+                    
+                # The alerts only count as sent once the email is delivered
+                def on_complete(success, permanent, due_recipient=due_recipient):
+                    self.ledger.complete_digest(due_recipient, success, permanent=permanent)
+                    
+                delivery_id = self.email_sender.queue_risk_digest(due_recipient, alerts, on_complete=on_complete)
+                if delivery_id is None:
+                    self.ledger.complete_digest(due_recipient, False)
+                delivery_ids[due_recipient] = delivery_id
+        return delivery_ids
+        
+    def _start_flusher(self):
+        """Start the thread that sends held-back digests once they are due."""
+        if not self.digest_interval:
+            return
+        with self._flush_lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="alert-digest", daemon=True)
+            self._flusher.start()
+            
+    def _flush_loop(self):
+        """Check for due digests a few times per interval."""
+        while not self._stop.wait(max(self.digest_interval / 10, 1)):
+            try:
+                self.flush_digests()
+            except Exception as e:
+                print(f"Error sending alert digests: {e}")
+                
+    def stop(self):
+        """Stop the digest thread and send whatever is still pending."""
+        self._stop.set()
+        self.flush_digests(force=True)
+        
+    def get_delivery_status(self, notification_result):
+        """Return the current delivery record for a notification result, if it was queued."""
+        delivery_id = notification_result.get("delivery_id")
+        if delivery_id is None:
+            return None
+        return self.email_sender.get_delivery_status(delivery_id)
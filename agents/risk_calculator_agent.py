@@ -1,20 +1,34 @@
 """Agent for calculating overall project risk."""
 
-import google.generativeai as genai
-from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-from config import GEMINI_API_KEY, HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, STATIC_RISK_WEIGHT, NEWS_RISK_WEIGHT
+import bisect
+from functools import cached_property
 
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+from crewai import Agent
+from config import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, STATIC_RISK_WEIGHT, NEWS_RISK_WEIGHT
+from utils.llm_cache import CachedGenerativeModel
+from utils.llm_client import get_llm_registry
 
 class RiskCalculatorAgent:
     def __init__(self):
-        """Initialize the risk calculator agent."""
-        self.llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro", google_api_key=GEMINI_API_KEY)
+        """Initialize the risk calculator agent.
+        
+        The LLM client, its response cache and the CrewAI agent are created on first use.
+        """
+        
+    @cached_property
+    def model(self):
+        """Cached, rate-limited Gemini model, created on first use."""
+        return CachedGenerativeModel(get_llm_registry().get_model())
+        
+    @cached_property
+    def llm(self):
+        """Shared LangChain chat model from the LLM client registry."""
+        return get_llm_registry().get_chat_model()
         
-        # Create CrewAI agent
-        self.agent = Agent(
+    @cached_property
+    def agent(self):
+        """CrewAI agent, created on first use."""
+        return Agent(
             role="Risk Calculator",
             goal="Calculate overall project risk by combining static and dynamic risk factors",
             backstory="I am a sophisticated risk analyst capable of weighing various risk factors to determine overall project risk levels.",
@@ -23,8 +37,11 @@ class RiskCalculatorAgent:
             allow_delegation=False
         )
         
-    def calculate_overall_risk(self, static_risk_analysis, news_risk_analysis):
-        """Calculate overall project risk by combining static and news risks."""
+    def calculate_overall_risk(self, static_risk_analysis, news_risk_analysis, generate_insights=True):
+        """Calculate overall project risk by combining static and news risks.
+        
+        With generate_insights=False the LLM call is skipped and insights is None.
+        """
         # Extract risk scores
         static_risk_score = static_risk_analysis.get("risk_score", 0)
         news_risk_score = news_risk_analysis.get("risk_score", 0)
@@ -47,13 +64,15 @@ class RiskCalculatorAgent:
         risk_factors.sort(key=lambda x: x.get("score", 0), reverse=True)
         
         # LLM analysis for additional insights
-        risk_insights = self._generate_risk_insights(
-            overall_score, 
-            risk_level, 
-            risk_factors, 
-            static_risk_analysis, 
-            news_risk_analysis
-        )
+        risk_insights = None
+        if generate_insights:
+            risk_insights = self._generate_risk_insights(
+                round(overall_score, 2), 
+                risk_level, 
+                risk_factors, 
+                static_risk_analysis, 
+                news_risk_analysis
+            )
         
         return {
             "risk_score": round(overall_score, 2),
@@ -64,8 +83,70 @@ class RiskCalculatorAgent:
             "news_risk_score": news_risk_score
         }
         
-    def _generate_risk_insights(self, overall_score, risk_level, risk_factors, static_risk_analysis, news_risk_analysis):
-        """Generate additional risk insights using LLM."""
+    def update_overall_risk(self, previous_overall_risk, static_risk_analysis, news_risk_analysis, changed_factors):
+        """Recombine a previous calculate_overall_risk result after some static factors changed.
+        
+        changed_factors is the {"removed": [...], "added": [...]} from
+        StaticRiskAgent.update_project_risks; only those entries are taken out
+        of or inserted into the sorted factor list, in the order the full sort
+        would give them (equal scores keep static before news, each in list
+        order). Previous insights are kept only when the insights prompt would
+        be unchanged, otherwise insights is None and can be streamed afresh.
+        """
+        static_risk_score = static_risk_analysis.get("risk_score", 0)
+        news_risk_score = news_risk_analysis.get("risk_score", 0)
+        overall_score = (static_risk_score * STATIC_RISK_WEIGHT) + (news_risk_score * NEWS_RISK_WEIGHT)
+        
+        if overall_score >= HIGH_RISK_THRESHOLD:
+            risk_level = "High"
+        elif overall_score >= MEDIUM_RISK_THRESHOLD:
+            risk_level = "Medium"
+        else:
+            risk_level = "Low"
+            
+        # Position of each factor in the list calculate_overall_risk would sort, to break score ties
+        combined = static_risk_analysis.get("risk_factors", []) + news_risk_analysis.get("risk_factors", [])
+        positions = {id(factor): i for i, factor in enumerate(combined)}
+        
+        # Patch the sorted factor list (highest score first) in place of a full re-sort
+        risk_factors = list(previous_overall_risk["risk_factors"])
+        for factor in changed_factors["removed"]:
+            if factor in risk_factors:
+                risk_factors.remove(factor)
+        if all(id(factor) in positions for factor in risk_factors + changed_factors["added"]):
+            sort_key = lambda x: (-x.get("score", 0), positions[id(x)])
+            for factor in changed_factors["added"]:
+                risk_factors.insert(bisect.bisect_left(risk_factors, sort_key(factor), key=sort_key), factor)
+        else:
+            # Factors that did not come from these analyses (e.g. reloaded results) can't be placed
+            risk_factors = sorted(combined, key=lambda x: x.get("score", 0), reverse=True)
+            
+        # Reuse the insights only if they would be generated from exactly the same prompt
+        insights = None
+        previous_prompt = self._build_insights_prompt(
+            previous_overall_risk["risk_score"],
+            previous_overall_risk["risk_level"],
+            previous_overall_risk["risk_factors"],
+            {"risk_score": previous_overall_risk.get("static_risk_score", 0)},
+            {"risk_score": previous_overall_risk.get("news_risk_score", 0)}
+        )
+        prompt = self._build_insights_prompt(
+            round(overall_score, 2), risk_level, risk_factors, static_risk_analysis, news_risk_analysis
+        )
+        if prompt == previous_prompt:
+            insights = previous_overall_risk.get("insights")
+            
+        return {
+            "risk_score": round(overall_score, 2),
+            "risk_level": risk_level,
+            "risk_factors": risk_factors,
+            "insights": insights,
+            "static_risk_score": static_risk_score,
+            "news_risk_score": news_risk_score
+        }
+        
+    def _build_insights_prompt(self, overall_score, risk_level, risk_factors, static_risk_analysis, news_risk_analysis):
+        """Build the LLM prompt for risk insights."""
         # Create a summary of the top risk factors
         top_factors = risk_factors[:5] if len(risk_factors) > 5 else risk_factors
         
@@ -75,7 +156,7 @@ class RiskCalculatorAgent:
         ])
         
         # Create prompt for the LLM
-        prompt = f"""
+        return f"""
         As a risk management expert, provide insights and recommendations based on the following project risk analysis:
         
         Overall Risk Score: {overall_score}
@@ -95,8 +176,29 @@ class RiskCalculatorAgent:
         Keep your response concise and actionable.
         """
         
-        # Get LLM response
-        model = genai.GenerativeModel('gemini-1.5-pro')
-        response = model.generate_content(prompt)
+    def _generate_risk_insights(self, overall_score, risk_level, risk_factors, static_risk_analysis, news_risk_analysis):
+        """Generate additional risk insights using LLM."""
+        prompt = self._build_insights_prompt(
+            overall_score, risk_level, risk_factors, static_risk_analysis, news_risk_analysis
+        )
+        
+        # Get LLM response (served from the cache for repeated prompts)
+        response = self.model.generate_content(prompt)
+        
+        return response.text
+        
+    def stream_risk_insights(self, overall_risk, static_risk_analysis, news_risk_analysis):
+        """Yield risk insights text as the LLM generates it.
+        
+        Takes the result of calculate_overall_risk(..., generate_insights=False)
+        and produces the same insights _generate_risk_insights would.
+        """
+        prompt = self._build_insights_prompt(
+            overall_risk["risk_score"],
+            overall_risk["risk_level"],
+            overall_risk["risk_factors"],
+            static_risk_analysis,
+            news_risk_analysis
+        )
         
-        return response.text
\ No newline at end of file
+        yield from self.model.stream_content(prompt)
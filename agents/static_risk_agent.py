@@ -1,24 +1,41 @@
 """Agent for analyzing static project risks."""
 
+import hashlib
 import os
-import google.generativeai as genai
+import threading
+from functools import cached_property
+
 from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-from config import GEMINI_API_KEY, HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD
-from utils.pdf_processor import extract_text_from_pdf
+from config import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, DOCUMENT_UPSERT_BATCH_SIZE, STATIC_FACTOR_MEMO_SIZE
+from utils.pdf_processor import chunk_text, extract_pages_from_pdf
+from utils.static_risk_scoring import STATIC_RISK_CATEGORIES, score_project_table, score_risk_factor
 from utils.vector_store import VectorStore
-
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+from utils.llm_client import get_llm_registry
 
 class StaticRiskAgent:
     def __init__(self):
-        """Initialize the static risk analysis agent."""
-        self.vector_store = VectorStore(collection_name="project_risks")
-        self.llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro", google_api_key=GEMINI_API_KEY)
+        """Initialize the static risk analysis agent.
+        
+        The vector store, LLM client and CrewAI agent are created on first use.
+        """
+        # Scored factors by (category, value), oldest first, shared by full and incremental analyses
+        self._factor_cache = {}
+        self._factor_lock = threading.Lock()
         
-        # Create CrewAI agent
-        self.agent = Agent(
+    @cached_property
+    def vector_store(self):
+        """Project document vector store, opened on first use."""
+        return VectorStore(collection_name="project_risks")
+        
+    @cached_property
+    def llm(self):
+        """Shared LangChain chat model from the LLM client registry."""
+        return get_llm_registry().get_chat_model()
+        
+    @cached_property
+    def agent(self):
+        """CrewAI agent, created on first use."""
+        return Agent(
             role="Static Risk Analyzer",
             goal="Analyze project documents and identify static risk factors",
             backstory="I am an expert in project risk assessment with years of experience in identifying risk factors from project documentation.",
@@ -28,108 +45,107 @@ class StaticRiskAgent:
         )
         
     def vectorize_project_document(self, pdf_path, project_id):
-        """Extract text from PDF and store in vector database."""
+        """Extract text from PDF and store it in the vector database as overlapping chunks.
+        
+        Pages are streamed one at a time and each chunk is stored under a
+        page/position id with a hash of its content, so re-uploading a
+        document only embeds and writes the chunks that changed. Chunks that
+        no longer exist are removed once every page has been extracted.
+        
+        Extraction errors are raised rather than swallowed: a failed read
+        leaves the previously stored chunks in place, and the caller's stage
+        is marked degraded.
+        """
         if not pdf_path or not os.path.exists(pdf_path):
             return False
             
-        # Extract text from PDF
-        document_text = extract_text_from_pdf(pdf_path)
+        existing_hashes = self.vector_store.get_content_hashes(project_id)
+        current_ids = set()
+        pending = []
+        
+        def flush():
+            if pending:
+                self.vector_store.upsert_documents(
+                    [chunk["id"] for chunk in pending],
+                    [chunk["text"] for chunk in pending],
+                    [chunk["metadata"] for chunk in pending]
+                )
+                pending.clear()
+                
+        # Extract, chunk and hash page by page
+        for page_number, page_text in extract_pages_from_pdf(pdf_path):
+            for chunk_index, chunk in enumerate(chunk_text(page_text)):
+                doc_id = f"project_{project_id}_p{page_number}_c{chunk_index}"
+                content_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+                current_ids.add(doc_id)
+                
+                if existing_hashes.get(doc_id) == content_hash:
+                    continue
+                    
+                pending.append({
+                    "id": doc_id,
+                    "text": chunk,
+                    "metadata": {
+                        "project_id": project_id,
+                        "type": "project_document",
+                        "page": page_number,
+                        "chunk": chunk_index,
+                        "content_hash": content_hash
+                    }
+                })
+                if len(pending) >= DOCUMENT_UPSERT_BATCH_SIZE:
+                    flush()
+                    
+        flush()
         
-        if not document_text:
+        if not current_ids:
             return False
             
-        # Store in vector database
-        self.vector_store.add_document(
-            doc_id=f"project_{project_id}",
-            text=document_text,
-            metadata={"project_id": project_id, "type": "project_document"}
-        )
+        # Every page was read, so anything not seen is from a previous version of the document
+        self.vector_store.delete_documents([doc_id for doc_id in existing_hashes if doc_id not in current_ids])
         
         return True
         
     def _evaluate_risk_category(self, category, value):
         """Evaluate risk level for a specific category."""
-        risk_score = 0
-        
-        if category == "project_location":
-            if value.lower() in ["us", "uk", "united states", "united kingdom"]:
-                risk_score = 30  # Low risk
-            elif value.lower() in ["india", "asia", "china", "japan", "southeast asia", "south asia"]:
-                risk_score = 60  # Medium risk
-            elif value.lower() in ["africa", "middle east", "afghanistan", "iraq", "syria"]:
-                risk_score = 85  # High risk
-            else:
-                risk_score = 50  # Default to medium
-                
-        elif category == "project_size":
-            try:
-                size = float(value)
-                if size < 20:
-                    risk_score = 30  # Low risk
-                elif size < 50:
-                    risk_score = 60  # Medium risk
-                else:
-                    risk_score = 85  # High risk
-            except ValueError:
-                risk_score = 50  # Default to medium
-                
-        elif category == "technology":
-            if "new" in value.lower() or "emerging" in value.lower() or "innovative" in value.lower():
-                risk_score = 85  # High risk
-            elif "established" in value.lower() or "proven" in value.lower() or "old" in value.lower():
-                risk_score = 30  # Low risk
-            else:
-                risk_score = 50  # Default to medium
-                
-        elif category == "employee_resignation":
-            risk_score = 85 if value.lower() == "yes" else 30
-            
-        elif category == "missed_milestone":
-            risk_score = 85 if value.lower() == "yes" else 30
+        return score_risk_factor(category, value)
+        
+    def _score_factor(self, category, value):
+        """Return the risk factor entry for one category value, memoized."""
+        key = (category, value)
+        with self._factor_lock:
+            factor = self._factor_cache.get(key)
+        if factor is None:
+            score = self._evaluate_risk_category(category, value)
             
-        elif category == "budget_problem":
-            risk_score = 85 if value.lower() == "yes" else 30
+            # Format category name for display
+            display_name = category.replace("_", " ").title()
             
-        return risk_score
-        
-    def analyze_project_risks(self, project_data):
-        """Analyze static risk factors for a project."""
-        risk_factors = []
-        total_score = 0
-        factor_count = 0
-        
-        # Evaluate each risk category
-        for category, value in project_data.items():
-            if value and category in [
-                "project_location", "project_size", "technology", 
-                "employee_resignation", "missed_milestone", "budget_problem"
-            ]:
-                score = self._evaluate_risk_category(category, value)
-                
-                # Format category name for display
-                display_name = category.replace("_", " ").title()
-                
-                # Determine risk level description
-                if score >= HIGH_RISK_THRESHOLD:
-                    risk_level = "High"
-                elif score >= MEDIUM_RISK_THRESHOLD:
-                    risk_level = "Medium"
-                else:
-                    risk_level = "Low"
-                
-                risk_factors.append({
-                    "name": display_name,
-                    "value": value,
-                    "score": score,
-                    "risk_level": risk_level,
-                    "description": f"{display_name} ({value}) - {risk_level} Risk"
-                })
+            # Determine risk level description
+            if score >= HIGH_RISK_THRESHOLD:
+                risk_level = "High"
+            elif score >= MEDIUM_RISK_THRESHOLD:
+                risk_level = "Medium"
+            else:
+                risk_level = "Low"
                 
-                total_score += score
-                factor_count += 1
+            factor = {
+                "name": display_name,
+                "value": value,
+                "score": score,
+                "risk_level": risk_level,
+                "description": f"{display_name} ({value}) - {risk_level} Risk"
+            }
+            with self._factor_lock:
+                self._factor_cache[key] = factor
+                while len(self._factor_cache) > STATIC_FACTOR_MEMO_SIZE:
+                    del self._factor_cache[next(iter(self._factor_cache))]
+        return dict(factor)
         
+    def _summarize(self, risk_factors, total_score):
+        """Build the analysis result from its factors and their score total."""
         # Calculate average risk score
-        avg_score = total_score / factor_count if factor_count > 0 else 0
+        avg_score = total_score / len(risk_factors) if risk_factors else 0
         
         # Determine overall risk level
         if avg_score >= HIGH_RISK_THRESHOLD:
@@ -142,5 +158,69 @@ class StaticRiskAgent:
         return {
             "risk_factors": risk_factors,
             "risk_score": round(avg_score, 2),
-            "risk_level": risk_level
-        }
\ No newline at end of file
+            "risk_level": risk_level,
+            "factor_total": total_score
+        }
+        
+    def analyze_project_risks(self, project_data):
+        """Analyze static risk factors for a project."""
+        risk_factors = []
+        total_score = 0
+        
+        # Evaluate each risk category
+        for category, value in project_data.items():
+            if value and category in STATIC_RISK_CATEGORIES:
+                factor = self._score_factor(category, value)
+                risk_factors.append(factor)
+                total_score += factor["score"]
+                
+        return self._summarize(risk_factors, total_score)
+        
+    def update_project_risks(self, previous_analysis, project_data, changed_fields):
+        """Re-score only the changed fields of a previous analyze_project_risks result.
+        
+        Returns (analysis, changed_factors) where changed_factors lists the
+        factor entries that were removed or added, for the risk calculator.
+        """
+        risk_factors = list(previous_analysis["risk_factors"])
+        total_score = previous_analysis["factor_total"]
+        removed, added = [], []
+        
+        for category in changed_fields:
+            if category not in STATIC_RISK_CATEGORIES:
+                continue
+                
+            # Drop the old entry for this category, keeping its position
+            display_name = category.replace("_", " ").title()
+            position = None
+            for i, factor in enumerate(risk_factors):
+                if factor["name"] == display_name:
+                    position = i
+                    removed.append(risk_factors.pop(i))
+                    total_score -= factor["score"]
+                    break
+                    
+            value = project_data.get(category)
+            if value:
+                # A newly filled field goes where analyze_project_risks would put it
+                if position is None:
+                    later = [
+                        name.replace("_", " ").title() for name in list(project_data)[list(project_data).index(category) + 1:]
+                    ]
+                    position = next(
+                        (i for i, factor in enumerate(risk_factors) if factor["name"] in later), len(risk_factors)
+                    )
+                factor = self._score_factor(category, value)
+                risk_factors.insert(position, factor)
+                added.append(factor)
+                total_score += factor["score"]
+                
+        return self._summarize(risk_factors, total_score), {"removed": removed, "added": added}
+        
+    def analyze_project_table(self, projects):
+        """Score static risk for a table of projects in bulk.
+        
+        Gives the same scores and levels as analyze_project_risks for each row;
+        see utils.static_risk_scoring.score_project_table for the output columns.
+        """
+        return score_project_table(projects)
\ No newline at end of file
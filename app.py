@@ -2,21 +2,16 @@
 
 import streamlit as st
 import pandas as pd
-import os
 from main import RiskManagementSystem
 from utils.pdf_processor import save_uploaded_pdf
+from utils.risk_history import get_history_store
+from utils.tracing import get_tracer
 from config import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD
-import google.generativeai as genai
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-# Initialize the risk management system
-risk_system = RiskManagementSystem()
+@st.cache_resource
+def get_risk_system():
+    """Build the risk management system once per process and share it across sessions."""
+    return RiskManagementSystem()
 
 # Set page configuration
 st.set_page_config(
@@ -63,6 +58,9 @@ with st.sidebar:
         # Project document upload
         project_doc = st.file_uploader("Upload Project Document (PDF)", type=["pdf"])
         
+        # Let the scheduler service keep this project's score current
+        monitor_project = st.checkbox("Re-evaluate in the background")
+        
         # Submit button
         submitted = st.form_submit_button("Analyze Risk")
 
@@ -88,11 +86,20 @@ if submitted:
             "project_manager_email": pm_email
         }
         
-        # Run the risk analysis
-        results = risk_system.analyze_project_risk(project_data, pdf_path)
+        # Run the risk analysis; insights are streamed in once the scores are shown.
+        # Re-submitting the same project without a new document only recomputes what the edited fields affect.
+        previous_results = st.session_state.get("last_results")
+        if previous_results and previous_results["project_data"].get("project_id") == project_id and not pdf_path:
+            results = get_risk_system().reanalyze_project_risk(previous_results, project_data)
+        else:
+            results = get_risk_system().analyze_project_risk(project_data, pdf_path, defer_insights=True)
+        st.session_state["last_results"] = results
+        
+        if monitor_project:
+            get_risk_system().history.register_project(project_data)
     
     # Display results in tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["Overall Risk", "Static Risks", "News Risks", "Notification Status"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Overall Risk", "Static Risks", "News Risks", "Notification Status", "Performance", "History"])
     
     # Tab 1: Overall Risk
     with tab1:
@@ -145,9 +152,9 @@ if submitted:
                 )
         
         with col2:
-            # Show insights
+            # Reserve space for insights; they are streamed in after every tab is drawn
             st.subheader("Risk Insights")
-            st.markdown(overall_risk.get("insights", "No insights available"))
+            insights_container = st.container()
         
         # Show top risk factors
         st.subheader("Top Risk Factors")
@@ -236,7 +243,7 @@ if submitted:
                     f"""
                     <div style="border:1px solid #DDDDDD; border-radius:5px; padding:10px; margin-bottom:10px;">
                         <h4>{news.get('title', '')}</h4>
-                        <p><strong>Source:</strong> {news.get('source', '')}</p>
+                        <p><strong>Source:</strong> {', '.join(news.get('sources', [news.get('source', '')]))}</p>
                         <p><strong>Date:</strong> {news.get('date', '')}</p>
                         <p><a href="{news.get('link', '#')}" target="_blank">Read more</a></p>
                     </div>
@@ -250,13 +257,18 @@ if submitted:
     with tab4:
         notification = results["notification"]
         
-        if notification.get("notification_sent", False):
-            st.success(f"✅ Notification sent to {notification.get('recipient', '')}")
+        if notification.get("notification_queued", False):
+            st.success(f"✅ Notification queued for {notification.get('recipient', '')}")
             
             # Show notification details
             st.markdown("### Notification Details")
             st.markdown(f"**Project:** {notification.get('project', '')}")
             st.markdown(f"**Timestamp:** {notification.get('timestamp', '')}")
+            delivery = get_risk_system().notification_agent.get_delivery_status(notification)
+            if delivery:
+                st.markdown(f"**Delivery Status:** {delivery['status']}")
+            elif notification.get("delivery_status") == "batched":
+                st.markdown("**Delivery Status:** held for this manager's next digest email")
             
             # Show preview of the email
             st.markdown("### Email Preview")
@@ -278,9 +290,97 @@ if submitted:
             )
         else:
             st.info(f"ℹ️ No notification sent. Reason: {notification.get('reason', 'Unknown')}")
+    
+    # Tab 5: Performance breakdown of this run
+    with tab5:
+        stage_timings = results.get("stage_timings", {})
+        if stage_timings:
+            st.subheader("Stage Durations")
+            st.bar_chart(pd.DataFrame(
+                {"Seconds": list(stage_timings.values())},
+                index=list(stage_timings.keys())
+            ))
+            
+        if results.get("degraded_stages"):
+            st.warning(f"Degraded stages: {', '.join(results['degraded_stages'])}")
+            
+        # Every span recorded under this run's trace
+        spans = get_tracer().get_trace(results.get("trace_id"))
+        if spans:
+            run_start = spans[0].start_ns
+            st.subheader("Trace")
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "Span": span.name,
+                        "Start (ms)": round((span.start_ns - run_start) / 1e6, 1),
+                        "Duration (ms)": round(span.duration * 1000, 1),
+                        "Status": span.status,
+                        "Details": ", ".join(f"{key}={value}" for key, value in span.attributes.items())
+                    }
+                    for span in spans
+                ]),
+                use_container_width=True
+            )
+        else:
+            st.info("No trace recorded for this run.")
+    
+    # Tab 6: Score trend for this project and recent escalations across projects
+    with tab6:
+        history = get_risk_system().history
+        trend = history.score_trend(project_id, days=90)
+        if trend:
+            st.subheader("Risk Score, Last 90 Days")
+            st.line_chart(pd.DataFrame(
+                {"Risk Score": [score for _, score, _ in trend]},
+                index=pd.to_datetime([ts for ts, _, _ in trend], unit="s")
+            ))
+            
+        escalations = history.crossed_high(days=7)
+        st.subheader("Projects That Became High Risk This Week")
+        if escalations:
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "Project ID": escalation["project_id"],
+                        "Time": pd.to_datetime(escalation["ts"], unit="s"),
+                        "Risk Score": escalation["risk_score"],
+                        "Previous Level": escalation["prev_level"] or "First run"
+                    }
+                    for escalation in escalations
+                ]),
+                use_container_width=True
+            )
+        else:
+            st.info("No project crossed into High risk in the last 7 days.")
+    
+    # Stream the LLM insights into the Overall Risk tab as they are generated
+    try:
+        insights_container.write_stream(get_risk_system().stream_insights(results))
+    except Exception as e:
+        insights_container.markdown("No insights available")
+        print(f"Error generating risk insights: {e}")
 
 # Show help information if no analysis has been run
 if not submitted:
+    # Latest scheduled results for monitored projects; nothing is recomputed here
+    overview = get_history_store().portfolio_overview()
+    if overview:
+        st.subheader("Monitored Projects")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Project ID": project["project_id"],
+                    "Risk Score": project["risk_score"],
+                    "Risk Level": project["risk_level"] or "Not evaluated yet",
+                    "Previous Level": project["prev_level"],
+                    "Evaluated": pd.to_datetime(project["ts"], unit="s") if project["ts"] else None
+                }
+                for project in overview
+            ]),
+            use_container_width=True
+        )
+        
     st.info("""
     ### How to use this system
     
@@ -0,0 +1,238 @@
+"""End-to-end benchmark that runs fully offline against local fakes.
+
+Gemini generation and embeddings are replaced by fakes with configurable
+latency, news pages are served from a local HTTP server and email goes to a
+local SMTP sink. Reports p50/p95 latency per stage and, given a baseline,
+exits non-zero when any p95 regresses beyond the tolerance.
+
+Run from the repository root:
+    python -m benchmarks.bench_end_to_end --iterations 10
+    python -m benchmarks.bench_end_to_end --write-baseline   # refresh benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import google.generativeai as genai
+import numpy as np
+from benchmarks.fakes import FakeEmbedder, FakeGenerativeModel, NewsSiteServer, build_news_page
+from benchmarks.pdf_fixtures import contract_pages, write_text_pdf
+from benchmarks.smtp_sink import SMTPSink
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+ECONOMIC_PATHS = ["/business", "/global-economy", "/markets"]
+GEOPOLITICAL_PATHS = ["/middle-east", "/world", "/international"]
+
+PROJECT = {
+    "project_name": "New Solar Power Plant",
+    "project_location": "Middle East",
+    "project_size": "75",
+    "technology": "new solar panel technology",
+    "employee_resignation": "no",
+    "missed_milestone": "yes",
+    "budget_problem": "yes",
+    "project_manager_email": "pm@example.com"
+}
+
+
+def build_system(args, news_server, smtp_sink):
+    """Create a RiskManagementSystem wired to the local fakes."""
+    # Imported here so relative data paths resolve inside the benchmark's working directory
+    from agents.notification_agent import NotificationAgent
+    from main import RiskManagementSystem
+    from utils.alert_ledger import AlertLedger
+    from utils.email_sender import EmailSender
+    from utils.llm_cache import CachedGenerativeModel, LLMResponseCache
+    from utils.llm_client import RateLimitedModel, get_llm_registry
+    from utils.news_scraper import NewsScraper
+    from utils.news_store import NewsSnapshotStore, set_news_store
+
+    genai.embed_content = FakeEmbedder(latency=args.embed_latency)
+
+    set_news_store(NewsSnapshotStore(scraper=NewsScraper(
+        parse_workers=0,
+        economic_sources=news_server.sources(ECONOMIC_PATHS),
+        geopolitical_sources=news_server.sources(GEOPOLITICAL_PATHS),
+        min_domain_interval=0
+    )))
+
+    system = RiskManagementSystem()
+
+    llm_cache = LLMResponseCache(path="llm_cache.sqlite3")
+    # Route the fake through the shared limiter, as real Gemini calls are
+    fake_model = RateLimitedModel(
+        FakeGenerativeModel(latency=args.llm_latency, first_token_latency=args.llm_first_token_latency),
+        get_llm_registry().limiter
+    )
+    system.news_risk_agent.model = CachedGenerativeModel(fake_model, cache=llm_cache)
+    system.risk_calculator_agent.model = CachedGenerativeModel(fake_model, cache=llm_cache)
+
+    system.notification_agent = NotificationAgent(
+        email_sender=EmailSender(
+            server=smtp_sink.host, port=smtp_sink.port, sender="risk-bench@example.com",
+            password="bench", use_tls=False
+        ),
+        ledger=AlertLedger(suppression_window=0),
+        digest_interval=0
+    )
+    return system, llm_cache
+
+
+def timed(samples, name, func):
+    """Call func, record its wall time under name and return its result."""
+    start = time.perf_counter()
+    result = func()
+    samples[name].append(time.perf_counter() - start)
+    return result
+
+
+def run_iteration(system, llm_cache, pdf_path, iteration, samples, warm_cache):
+    """Exercise every benchmarked path once."""
+    def reset_cache():
+        if not warm_cache:
+            llm_cache.clear()
+            system.news_risk_agent.clear_headline_scores()
+
+    project = dict(PROJECT, project_id=f"bench-{iteration}")
+
+    timed(samples, "news_refresh", system.news_risk_agent.news_store.refresh)
+
+    timed(samples, "vectorize_project_document", lambda: system.static_risk_agent.vectorize_project_document(
+        pdf_path, f"bench-doc-{iteration}"
+    ))
+
+    reset_cache()
+    timed(samples, "analyze_news_risks", lambda: system.news_risk_agent.analyze_news_risks(project))
+
+    reset_cache()
+    result = timed(samples, "analyze_project_risk", lambda: system.analyze_project_risk(
+        dict(project, project_id=f"bench-e2e-{iteration}"), pdf_path=pdf_path
+    ))
+    for stage, seconds in result["stage_timings"].items():
+        samples[f"stage.{stage}"].append(seconds)
+    if result["degraded_stages"]:
+        print(f"  iteration {iteration}: degraded stages {result['degraded_stages']}")
+
+    # What the Streamlit app does: deterministic results first, then streamed insights
+    reset_cache()
+    start = time.perf_counter()
+    ui_result = system.analyze_project_risk(project, defer_insights=True)
+    samples["ui.results_ready"].append(time.perf_counter() - start)
+    first_chunk = None
+    for _ in system.stream_insights(ui_result):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+    samples["ui.first_insight_chunk"].append(first_chunk or 0.0)
+    samples["ui.insights_complete"].append(time.perf_counter() - start)
+
+
+def summarize(samples):
+    """Return {metric: {"p50", "p95", "n"}} in seconds."""
+    return {
+        name: {
+            "p50": round(float(np.percentile(values, 50)), 4),
+            "p95": round(float(np.percentile(values, 95)), 4),
+            "n": len(values)
+        }
+        for name, values in sorted(samples.items())
+    }
+
+
+def compare(summary, baseline, tolerance, min_slack):
+    """Return a list of (metric, baseline p95, current p95) that regressed."""
+    regressions = []
+    for name, reference in baseline.get("metrics", {}).items():
+        current = summary.get(name)
+        if current is None:
+            continue
+        limit = reference["p95"] * (1 + tolerance) + min_slack
+        if current["p95"] > limit:
+            regressions.append((name, reference["p95"], current["p95"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per fake generate_content call")
+    parser.add_argument("--llm-first-token-latency", type=float, default=0.15)
+    parser.add_argument("--embed-latency", type=float, default=0.2, help="Seconds per fake embed_content call")
+    parser.add_argument("--news-latency", type=float, default=0.05, help="Seconds per local news page request")
+    parser.add_argument("--smtp-latency", type=float, default=0.05, help="Seconds per SMTP delivery")
+    parser.add_argument("--pages", type=int, default=8, help="Pages in the benchmark contract PDF")
+    parser.add_argument("--warm-cache", action="store_true", help="keep LLM responses cached between runs")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--write-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p95 increase")
+    parser.add_argument("--min-slack", type=float, default=0.02, help="Allowed absolute p95 increase in seconds")
+    args = parser.parse_args()
+
+    original_cwd = os.getcwd()
+    pages = {path: build_news_page(path.strip("/")) for path in ECONOMIC_PATHS + GEOPOLITICAL_PATHS}
+
+    with tempfile.TemporaryDirectory() as directory, \
+            NewsSiteServer(pages, latency=args.news_latency) as news_server, \
+            SMTPSink(latency=args.smtp_latency) as smtp_sink:
+        os.chdir(directory)
+        try:
+            pdf_path = os.path.join(directory, "contract.pdf")
+            write_text_pdf(pdf_path, contract_pages(args.pages))
+
+            system, llm_cache = build_system(args, news_server, smtp_sink)
+            # Warm-up run so imports and first connections are not measured
+            run_iteration(system, llm_cache, pdf_path, "warmup", defaultdict(list), args.warm_cache)
+
+            samples = defaultdict(list)
+            for iteration in range(args.iterations):
+                run_iteration(system, llm_cache, pdf_path, iteration, samples, args.warm_cache)
+
+            email_sender = system.notification_agent.email_sender
+            email_sender.wait_for_deliveries(timeout=30)
+            emails = len(smtp_sink.messages)
+        finally:
+            os.chdir(original_cwd)
+
+    summary = summarize(samples)
+    print(f"{'metric':<34} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for name, stats in summary.items():
+        print(f"{name:<34} {stats['p50'] * 1000:10.1f} {stats['p95'] * 1000:10.1f}")
+    print(f"{emails} emails delivered to the SMTP sink")
+
+    settings = {
+        key: getattr(args, key)
+        for key in ("llm_latency", "llm_first_token_latency", "embed_latency", "news_latency", "smtp_latency", "pages", "warm_cache")
+    }
+
+    if args.write_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "metrics": summary}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --write-baseline to create one.")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != settings:
+        print("Warning: baseline was recorded with different settings; comparison may be meaningless.")
+
+    regressions = compare(summary, baseline, args.tolerance, args.min_slack)
+    for name, reference, current in regressions:
+        print(f"REGRESSION {name}: p95 {current * 1000:.1f} ms vs baseline {reference * 1000:.1f} ms")
+    if regressions:
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
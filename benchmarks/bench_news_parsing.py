@@ -0,0 +1,91 @@
+"""Micro-benchmark for news headline extraction.
+
+Run from the repository root:
+    python -m benchmarks.bench_news_parsing
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+from utils.news_scraper import parse_headlines
+
+SOURCE = {"url": "https://www.example.com/world", "domain": "example.com"}
+
+
+def build_page(headline_count=200, filler_paragraphs=2000):
+    """Build a synthetic news page with headlines buried in ordinary markup."""
+    parts = ["<html><head><title>World</title></head><body><nav><ul>"]
+    parts.extend(f"<li><a href='/section/{i}'>Section {i}</a></li>" for i in range(50))
+    parts.append("</ul></nav><main>")
+    for i in range(filler_paragraphs):
+        if i % (filler_paragraphs // headline_count) == 0:
+            tag = ("h2", "h3", "h4")[i % 3]
+            parts.append(f"<{tag}><a href='/news/{i}'>Tariff dispute escalates as currency falls, story {i}</a></{tag}>")
+        parts.append(f"<div class='card'><p>Paragraph {i} with <span>some</span> body text and <b>markup</b>.</p></div>")
+    parts.append("</main><footer>Footer</footer></body></html>")
+    return "".join(parts)
+
+
+def legacy_parse_headlines(html, source):
+    """The original extraction: full html.parser tree and find_all over the whole document."""
+    news = []
+    soup = BeautifulSoup(html, 'html.parser')
+    for headline in soup.find_all(['h2', 'h3', 'h4']):
+        if headline.text and len(headline.text.strip()) > 10:
+            link = None
+            if headline.find('a'):
+                link = headline.find('a').get('href')
+                if link and not link.startswith('http'):
+                    link = f"https://{source['domain']}{link}"
+            news.append({
+                "title": headline.text.strip(),
+                "source": source["domain"],
+                "link": link,
+                "date": datetime.now().strftime("%Y-%m-%d")
+            })
+    return news
+
+
+def measure(label, pages, parse):
+    """Parse every page serially and report pages per second."""
+    start = time.perf_counter()
+    for page in pages:
+        parse(page, SOURCE)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(pages) / elapsed:8.1f} pages/s")
+
+
+def measure_pool(label, pages, workers):
+    """Parse pages on a process pool and report pages per second."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Warm the workers so start-up cost is not counted
+        list(executor.map(parse_headlines, pages[:workers], [SOURCE] * workers))
+        start = time.perf_counter()
+        list(executor.map(parse_headlines, pages, [SOURCE] * len(pages)))
+        elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(pages) / elapsed:8.1f} pages/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    pages = [build_page() for _ in range(args.pages)]
+    print(f"{args.pages} pages of {len(pages[0]) // 1024} KiB each")
+
+    # Both paths must extract the same headlines
+    assert [n["title"] for n in legacy_parse_headlines(pages[0], SOURCE)] == \
+        [n["title"] for n in parse_headlines(pages[0], SOURCE)]
+
+    measure("before (html.parser, full)", pages, legacy_parse_headlines)
+    measure("after (lxml, strained)", pages, parse_headlines)
+    measure_pool(f"after + {args.workers} processes", pages, args.workers)
+
+
+if __name__ == "__main__":
+    main()
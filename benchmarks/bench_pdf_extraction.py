@@ -0,0 +1,69 @@
+"""Benchmark for PDF text extraction on locally generated multi-hundred-page documents.
+
+Run from the repository root:
+    python -m benchmarks.bench_pdf_extraction --pages 200 400 --workers 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pdfplumber
+from benchmarks.pdf_fixtures import contract_pages, write_text_pdf
+from utils.pdf_processor import extract_pages_from_pdf
+
+
+def legacy_extract_text(pdf_path):
+    """The original extractor: serial pages and repeated string concatenation."""
+    text = ""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            text += page.extract_text() or ""
+    return text
+
+
+def measure(label, func, trace_memory=False):
+    """Run func once and report wall time, and optionally peak Python memory in this process."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    line = f"  {label:<24} {elapsed:7.2f} s"
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        line += f"   peak {peak / 2 ** 20:7.1f} MiB"
+    print(line)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 400])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report peak memory (tracemalloc slows extraction considerably)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for page_count in args.pages:
+            pdf_path = os.path.join(directory, f"contract_{page_count}.pdf")
+            write_text_pdf(pdf_path, contract_pages(page_count))
+            print(f"{page_count} pages ({os.path.getsize(pdf_path) // 1024} KiB)")
+
+            legacy = measure("before (serial)", lambda: legacy_extract_text(pdf_path), args.trace_memory)
+            serial = measure("after, 1 worker", lambda: sum(
+                len(text) for _, text in extract_pages_from_pdf(pdf_path, workers=1)
+            ), args.trace_memory)
+            parallel = measure(f"after, {args.workers} workers", lambda: sum(
+                len(text) for _, text in extract_pages_from_pdf(pdf_path, workers=args.workers)
+            ), args.trace_memory)
+            assert len(legacy) == serial == parallel
+
+
+if __name__ == "__main__":
+    main()
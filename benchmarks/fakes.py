@@ -0,0 +1,186 @@
+"""Local stand-ins for Gemini and news sites so benchmarks run fully offline."""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.local_vector_index import HashingEmbedder
+
+_HEADLINE_PATTERN = re.compile(r'^\s*(\d+)\. "', re.MULTILINE)
+
+INSIGHTS_TEXT = (
+    "1. Key risk drivers: budget overruns and missed milestones, compounded by currency volatility "
+    "and tariff exposure in the project region.\n"
+    "2. Recommendations: re-baseline the schedule, hedge currency exposure for imported equipment, "
+    "and review supplier contracts for tariff pass-through clauses.\n"
+    "3. Impact if unaddressed: further cost escalation and delayed commissioning."
+)
+
+
+class FakeResponse:
+    """Stand-in for a generate_content response or streamed chunk."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Answer generate_content like Gemini would, after a configurable delay.
+
+    Batched headline-scoring prompts get a JSON array with one deterministic
+    score per headline; anything else gets a fixed insights text.
+    latency is the time to the full response; streamed responses spread it
+    over chunks, with first_token_latency before the first one.
+    """
+
+    def __init__(self, latency=0.5, first_token_latency=0.15, model_name="fake-gemini"):
+        self.latency = latency
+        self.first_token_latency = first_token_latency
+        self.model_name = model_name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt):
+        indexes = [int(index) for index in _HEADLINE_PATTERN.findall(prompt)]
+        if not indexes:
+            return INSIGHTS_TEXT
+
+        results = []
+        for index in indexes:
+            # Skewed towards risky so benchmark projects reach the notification path
+            score = 40 + int(hashlib.md5(f"{prompt}\0{index}".encode()).hexdigest(), 16) % 61
+            level = "High" if score >= 70 else "Medium" if score >= 40 else "Low"
+            results.append({"index": index, "score": score, "risk_level": level, "explanation": "Synthetic score"})
+        return json.dumps(results)
+
+    def _stream(self, text):
+        words = text.split(" ")
+        chunk_count = max(len(words) // 8, 1)
+        time.sleep(self.first_token_latency)
+        delay = max(self.latency - self.first_token_latency, 0) / chunk_count
+        for i in range(chunk_count):
+            chunk = words[i * len(words) // chunk_count:(i + 1) * len(words) // chunk_count]
+            yield FakeResponse(" ".join(chunk) + ("" if i == chunk_count - 1 else " "))
+            if i < chunk_count - 1:
+                time.sleep(delay)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        text = self._respond(prompt)
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency)
+        return FakeResponse(text)
+
+
+class FakeEmbedder:
+    """Drop-in for genai.embed_content returning local hashing embeddings after a delay."""
+
+    def __init__(self, latency=0.2, dim=768):
+        self.latency = latency
+        self.embedder = HashingEmbedder(dim)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, model, content, task_type=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        texts = [content] if isinstance(content, str) else list(content)
+        vectors = self.embedder.embed(texts).tolist()
+        return {"embedding": vectors[0] if isinstance(content, str) else vectors}
+
+
+class _NewsPageHandler(BaseHTTPRequestHandler):
+    """Serve in-memory pages with ETag revalidation."""
+
+    def do_GET(self):
+        server = self.server
+        page = server.pages.get(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        if server.latency:
+            time.sleep(server.latency)
+
+        body, etag = page
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NewsSiteServer:
+    """Local HTTP server for recorded or synthetic news pages.
+
+    pages maps a path such as "/reuters" to HTML; sources() returns a
+    NewsScraper source list pointing at them.
+    """
+
+    def __init__(self, pages, host="127.0.0.1", port=0, latency=0.0):
+        self._server = ThreadingHTTPServer((host, port), _NewsPageHandler)
+        self._server.daemon_threads = True
+        self._server.latency = latency
+        self._server.pages = {}
+        for path, html in pages.items():
+            self.set_page(path, html)
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    def set_page(self, path, html):
+        """Add or replace a page; a changed page gets a new ETag."""
+        body = html.encode("utf-8")
+        self._server.pages[path] = (body, f'"{hashlib.md5(body).hexdigest()}"')
+
+    def sources(self, paths):
+        """Return scraper sources for the given paths, one pseudo-domain per page."""
+        return [
+            {"url": f"http://{self.host}:{self.port}{path}", "domain": f"{path.strip('/')}.local"}
+            for path in paths
+        ]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="news-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def build_news_page(topic, headline_count=40):
+    """Build a news page whose headlines mention the keywords projects filter on."""
+    subjects = [
+        "tariff", "currency", "exchange rate", "import ban", "Middle East", "solar panel technology",
+        "export ban", "shipping", "elections", "interest rates"
+    ]
+    parts = [f"<html><head><title>{topic}</title></head><body><nav><a href='/'>Home</a></nav><main>"]
+    for i in range(headline_count):
+        subject = subjects[i % len(subjects)]
+        tag = ("h2", "h3", "h4")[i % 3]
+        parts.append(f"<{tag}><a href='/{topic}/{i}'>{topic.title()} update {i}: {subject} concerns weigh on markets</a></{tag}>")
+        parts.append(f"<p>Story {i} body text with <b>markup</b>.</p>")
+    parts.append("</main></body></html>")
+    return "".join(parts)
@@ -0,0 +1,58 @@
+"""Generate text-only PDF files locally for benchmarks, with no extra dependencies."""
+
+
+def _escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path, pages):
+    """Write a PDF with one page per entry in pages, each a list of text lines."""
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>", None]
+    font_id, pages_id = 1, 2
+    kids = []
+
+    for lines in pages:
+        operators = ["BT /F1 10 Tf 50 780 Td 12 TL"]
+        operators.extend(f"({_escape(line)}) Tj T*" for line in lines)
+        operators.append("ET")
+        stream = "\n".join(operators).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 612 792] /Contents {content_id} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode()
+        )
+        kids.append(len(objects))
+
+    objects[pages_id - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode()
+    )
+    objects.append(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+    catalog_id = len(objects)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for object_id, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{object_id} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+def contract_pages(page_count, lines_per_page=55):
+    """Build page contents that read like a project contract."""
+    return [
+        [
+            f"Section {page}.{line}: The contractor shall deliver milestone {line} for site {page % 7} "
+            f"within budget, subject to tariff and currency adjustments."
+            for line in range(lines_per_page)
+        ]
+        for page in range(1, page_count + 1)
+    ]
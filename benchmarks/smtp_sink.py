@@ -0,0 +1,145 @@
+"""Local SMTP stand-in that accepts mail in memory, for benchmarks and manual testing.
+
+Usage:
+    python -m benchmarks.smtp_sink --port 8025
+
+then run the app with SMTP_SERVER=127.0.0.1 SMTP_PORT=8025 SMTP_USE_TLS=false.
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Speak just enough SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, NOOP, RSET, QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink = self.server.sink
+        sink._record_connection()
+        self.reply("220 smtp-sink ready")
+        sender, recipients = None, []
+
+        for raw in self.rfile:
+            command = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = command[:4].upper()
+
+            if verb == "EHLO":
+                self.reply("250-smtp-sink")
+                self.reply("250 8BITMIME")
+            elif verb == "HELO":
+                self.reply("250 smtp-sink")
+            elif verb == "MAIL":
+                sender, recipients = command.split(":", 1)[1].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                if sink.latency:
+                    time.sleep(sink.latency)
+                if sink._should_fail():
+                    self.reply("451 Temporary failure")
+                else:
+                    sink._record_message(sender, recipients, b"".join(lines))
+                    self.reply("250 OK queued")
+                sender, recipients = None, []
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """In-memory SMTP server running on a background thread.
+
+    latency adds a delay to every DATA command, and fail_first makes the first
+    N deliveries fail with a temporary (451) error to exercise retries.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_first=0):
+        """Bind the server; port 0 picks a free port."""
+        self.latency = latency
+        self.fail_first = fail_first
+        self.messages = []
+        self.connections = 0
+        self._lock = threading.Lock()
+
+        self._server = _ThreadingSMTPServer((host, port), _SMTPHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    def _record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def _should_fail(self):
+        with self._lock:
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                return True
+            return False
+
+    def _record_message(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append({"sender": sender, "recipients": recipients, "data": data})
+
+    def start(self):
+        """Start serving on a daemon thread and return self."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every delivery")
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, latency=args.latency).start()
+    print(f"SMTP sink listening on {sink.host}:{sink.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{len(sink.messages)} messages over {sink.connections} connections")
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
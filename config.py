@@ -9,13 +9,117 @@ load_dotenv()
 # API Keys
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# LLM client limits, shared by every agent in the process
+LLM_MODEL_NAME = "gemini-1.5-pro"
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))  # 0 disables
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))  # 0 disables
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+LLM_MAX_RETRIES = 4  # Retries on 429/5xx responses
+LLM_RETRY_BASE_DELAY = 1  # Seconds; backoff doubles per attempt, with full jitter
+LLM_RETRY_MAX_DELAY = 30
+LLM_OUTPUT_TOKEN_ESTIMATE = 500  # Output tokens assumed per call until usage is reported
+
 # Database
 CHROMA_DB_PATH = "./data/vector_db"
 
+# Vector store backend: "chroma" (Chroma + Gemini embeddings) or "local"
+# (CPU hashing embeddings + memory-mapped NumPy index, works offline)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma")
+LOCAL_VECTOR_INDEX_PATH = "./data/local_index"
+LOCAL_EMBEDDING_DIM = 512
+LOCAL_INDEX_APPROX_MIN_ROWS = 50000  # Switch to approximate search at this many rows
+LOCAL_INDEX_LSH_BITS = 128
+
+# Document ingestion
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PDF_PAGES_PER_TASK = 8  # Pages extracted per worker task
+DOCUMENT_CHUNK_SIZE = 1500  # Characters per chunk
+DOCUMENT_CHUNK_OVERLAP = 200  # Characters shared by neighbouring chunks
+DOCUMENT_UPSERT_BATCH_SIZE = 64  # Chunks embedded and written per batch
+
+# Embeddings
+EMBEDDING_CACHE_PATH = "./data/embedding_cache.sqlite3"
+EMBEDDING_BATCH_SIZE = 100  # Texts per embedding request (API maximum)
+EMBEDDING_MAX_RETRIES = 3
+
+# LLM response cache
+LLM_CACHE_PATH = "./data/llm_cache.sqlite3"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(6 * 60 * 60)))  # Seconds
+LLM_CACHE_MAX_ENTRIES = 5000
+
+# News scraping
+NEWS_FETCH_WORKERS = int(os.getenv("NEWS_FETCH_WORKERS", "6"))
+NEWS_PARSE_WORKERS = int(os.getenv("NEWS_PARSE_WORKERS", "2"))  # 0 parses in the fetch threads
+NEWS_REQUEST_TIMEOUT = 10
+NEWS_DOMAIN_MIN_INTERVAL = 2  # Minimum seconds between requests to the same domain
+NEWS_SNAPSHOT_MAX_AGE = int(os.getenv("NEWS_SNAPSHOT_MAX_AGE", "600"))  # Seconds before a snapshot is stale
+NEWS_REFRESH_INTERVAL = int(os.getenv("NEWS_REFRESH_INTERVAL", "300"))  # Seconds between background refreshes
+
+# News risk scoring
+NEWS_MAX_SCORED_ITEMS = 10  # Headlines sent to the LLM per analysis
+NEWS_SCORING_BATCH_SIZE = 10  # Headlines scored per LLM request
+NEWS_SCORING_MAX_PARALLEL = 2  # Concurrent LLM scoring requests
+NEWS_HEADLINE_MEMO_SIZE = 10000  # Headline scores remembered per process for re-scoring
+STATIC_FACTOR_MEMO_SIZE = 10000  # Scored (category, value) static factors remembered per process
+NEWS_DEDUP_MAX_DISTANCE = 12  # SimHash bits (of 64) within which headlines count as the same story
+NEWS_RELEVANCE_MIN_RATIO = float(os.getenv("NEWS_RELEVANCE_MIN_RATIO", "0.25"))  # Minimum BM25 relevance, as a fraction of the best headline's, for a headline to be sent to the LLM
+NEWS_PROFILE_TERM_WEIGHT = 2.0  # Relevance weight of the project's location and technology relative to the base keywords
+
+# Per-stage deadlines for analyze_project_risk, in seconds
+STAGE_TIMEOUTS = {
+    "vectorize_document": 120,
+    "static_analysis": 10,
+    "news_analysis": 60,
+    "overall_risk": 60,
+    "notification": 30
+}
+
+# Tracing and metrics
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")  # JSONL span export file, e.g. ./data/traces.jsonl; empty disables it
+TRACE_EXPORT_MAX_BYTES = int(os.getenv("TRACE_EXPORT_MAX_BYTES", str(50 * 1024 * 1024)))  # Size at which the export file is rotated to <path>.1
+TRACE_BUFFER_SIZE = 5000  # Recent spans kept in memory for the Performance tab
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))  # Prometheus /metrics endpoint; 0 disables
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # Bind address for /metrics; use 0.0.0.0 to expose it on all interfaces
+
+# Portfolio analysis
+PORTFOLIO_MAX_WORKERS = int(os.getenv("PORTFOLIO_MAX_WORKERS", "8"))
+
 # Risk thresholds
 HIGH_RISK_THRESHOLD = 70
 MEDIUM_RISK_THRESHOLD = 40
 
+# Static risk scoring rules, evaluated in order; the first matching rule sets the score.
+# "exact" compares the lowercased value, "contains" looks for substrings of the
+# lowercased value, and "numeric" compares float(value) against ascending upper bounds.
+STATIC_RISK_RULES = {
+    "project_location": {
+        "match": "exact",
+        "rules": [
+            (["us", "uk", "united states", "united kingdom"], 30),  # Low risk
+            (["india", "asia", "china", "japan", "southeast asia", "south asia"], 60),  # Medium risk
+            (["africa", "middle east", "afghanistan", "iraq", "syria"], 85)  # High risk
+        ],
+        "default": 50
+    },
+    "project_size": {
+        "match": "numeric",
+        "rules": [(20, 30), (50, 60)],  # (exclusive upper bound, score)
+        "above": 85,
+        "default": 50
+    },
+    "technology": {
+        "match": "contains",
+        "rules": [
+            (["new", "emerging", "innovative"], 85),  # High risk
+            (["established", "proven", "old"], 30)  # Low risk
+        ],
+        "default": 50
+    },
+    "employee_resignation": {"match": "exact", "rules": [(["yes"], 85)], "default": 30},
+    "missed_milestone": {"match": "exact", "rules": [(["yes"], 85)], "default": 30},
+    "budget_problem": {"match": "exact", "rules": [(["yes"], 85)], "default": 30}
+}
+
 # Risk weights (adjust as needed)
 STATIC_RISK_WEIGHT = 0.6
 NEWS_RISK_WEIGHT = 0.4
@@ -24,4 +128,27 @@ NEWS_RISK_WEIGHT = 0.4
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 EMAIL_SENDER = os.getenv("EMAIL_SENDER")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
\ No newline at end of file
+EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = 10  # Seconds
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))  # Concurrent SMTP connections
+SMTP_IDLE_TIMEOUT = 60  # Seconds an idle connection is kept for reuse
+EMAIL_MAX_RETRIES = 3
+EMAIL_RETRY_BACKOFF = 2  # Seconds; doubles after each failed attempt
+EMAIL_DELIVERY_HISTORY = 1000  # Finished delivery records kept for get_delivery_status
+
+# Alert deduplication and digests
+ALERT_LEDGER_PATH = "./data/alert_ledger.sqlite3"
+ALERT_SUPPRESSION_WINDOW = int(os.getenv("ALERT_SUPPRESSION_WINDOW", str(24 * 60 * 60)))  # Seconds before an unchanged alert is re-sent
+ALERT_DIGEST_INTERVAL = int(os.getenv("ALERT_DIGEST_INTERVAL", "900"))  # Minimum seconds between emails to one recipient; 0 sends immediately
+ALERT_SCORE_BUCKET = 10  # Score band width used in alert fingerprints
+ALERT_RETRY_BASE_DELAY = 60  # Seconds before a failed digest is retried, doubling with each failure
+ALERT_RETRY_MAX_DELAY = 3600  # Longest wait between digest retries
+ALERT_MAX_DELIVERY_ATTEMPTS = 5  # Failed deliveries before a recipient's digest alerts are dropped
+
+# Risk history
+RISK_HISTORY_PATH = "./data/risk_history.sqlite3"
+
+# Background re-evaluation
+SCHEDULER_INTERVAL = int(os.getenv("SCHEDULER_INTERVAL", "3600"))  # Seconds between re-evaluations of the portfolio
+SCHEDULER_MAX_WORKERS = int(os.getenv("SCHEDULER_MAX_WORKERS", "4"))  # Projects evaluated concurrently
\ No newline at end of file
@@ -1,16 +1,19 @@
 """Main module for the AI-powered risk management system."""
 
 import os
-import google.generativeai as genai
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
 from crewai import Crew, Task
-from config import GEMINI_API_KEY
+from config import PORTFOLIO_MAX_WORKERS, STAGE_TIMEOUTS
 from agents.static_risk_agent import StaticRiskAgent
 from agents.news_risk_agent import NewsRiskAgent
 from agents.risk_calculator_agent import RiskCalculatorAgent
 from agents.notification_agent import NotificationAgent
-
-# Configure Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
+from utils.keyword_matcher import match_keyword_sets
+from utils.risk_history import get_history_store
+from utils.stage_executor import StageGraph
+from utils.tracing import span, start_metrics_server
 
 class RiskManagementSystem:
     def __init__(self):
@@ -21,25 +24,229 @@ class RiskManagementSystem:
         self.risk_calculator_agent = RiskCalculatorAgent()
         self.notification_agent = NotificationAgent()
         
-        # Setup CrewAI
-        self.agents = [
+        # Every analysis result is appended to the risk history
+        self.history = get_history_store()
+        
+        # Warm the shared news snapshot in the background
+        self.news_risk_agent.news_store.start()
+        
+        # Expose Prometheus metrics (no-op if METRICS_PORT is 0)
+        start_metrics_server()
+        
+    @property
+    def agents(self):
+        """CrewAI agents, built on first access since only run_crew_workflow needs them."""
+        return [
             self.static_risk_agent.agent,
             self.news_risk_agent.agent,
             self.risk_calculator_agent.agent,
             self.notification_agent.agent
         ]
         
-    def analyze_project_risk(self, project_data, pdf_path=None):
-        """Analyze project risk with the full agent crew."""
-        # Step 1: Analyze static risks
-        if pdf_path:
-            self.static_risk_agent.vectorize_project_document(pdf_path, project_data.get("project_id", "unknown"))
-            
-        static_risk_analysis = self.static_risk_agent.analyze_project_risks(project_data)
+    def analyze_project_risk(self, project_data, pdf_path=None, defer_insights=False):
+        """Analyze project risk with the full agent crew.
+        
+        Document vectorization, static analysis and news analysis run
+        concurrently; risk calculation and notification follow once their
+        inputs are ready. A stage that fails or misses its deadline in
+        STAGE_TIMEOUTS falls back to a neutral result and is listed in
+        "degraded_stages". Per-stage wall times are in "stage_timings".
+        
+        With defer_insights=True the LLM insights are left as None so the
+        deterministic results return immediately; use stream_insights to
+        generate them afterwards.
+        
+        Every stage runs in a tracing span under one trace whose id is
+        returned as "trace_id".
+        """
+        project_id = project_data.get("project_id", "unknown")
+        graph = StageGraph()
+        
+        # Step 1: Vectorize the project document and analyze static risks
+        graph.add_stage(
+            "vectorize_document",
+            lambda _: self.static_risk_agent.vectorize_project_document(pdf_path, project_id) if pdf_path else False,
+            timeout=STAGE_TIMEOUTS["vectorize_document"],
+            fallback=lambda _: False
+        )
+        graph.add_stage(
+            "static_analysis",
+            lambda _: self.static_risk_agent.analyze_project_risks(project_data),
+            timeout=STAGE_TIMEOUTS["static_analysis"],
+            fallback=lambda _: {"risk_factors": [], "risk_score": 0, "risk_level": "Low"}
+        )
         
         # Step 2: Analyze news risks
-        news_risk_analysis = self.news_risk_agent.analyze_news_risks(project_data)
+        graph.add_stage(
+            "news_analysis",
+            lambda _: self.news_risk_agent.analyze_news_risks(project_data),
+            timeout=STAGE_TIMEOUTS["news_analysis"],
+            fallback=lambda _: {"risk_factors": [], "risk_score": 0, "risk_level": "Low", "news_items": []}
+        )
         
+        # Step 3: Calculate overall risk; without insights if the LLM is too slow
+        graph.add_stage(
+            "overall_risk",
+            lambda r: self.risk_calculator_agent.calculate_overall_risk(
+                r["static_analysis"], r["news_analysis"], generate_insights=not defer_insights
+            ),
+            depends_on=["static_analysis", "news_analysis"],
+            timeout=STAGE_TIMEOUTS["overall_risk"],
+            fallback=lambda r: {
+                **self.risk_calculator_agent.calculate_overall_risk(
+                    r["static_analysis"], r["news_analysis"], generate_insights=False
+                ),
+                "insights": "Risk insights are unavailable for this run."
+            }
+        )
+        
+        # Step 4: Handle notifications if needed
+        graph.add_stage(
+            "notification",
+            lambda r: self.notification_agent.handle_risk_notification(project_data, r["overall_risk"]),
+            depends_on=["overall_risk"],
+            timeout=STAGE_TIMEOUTS["notification"],
+            fallback=lambda _: {"notification_queued": False, "reason": "Notification stage did not complete"}
+        )
+        
+        with span("analyze_project_risk", project_id=str(project_id), has_document=bool(pdf_path)) as run_span:
+            run = graph.run()
+            run_span.set_attributes(degraded_stages=",".join(run["degraded"]))
+        results = run["results"]
+        
+        # Combine all results
+        return self._record_history({
+            "project_data": project_data,
+            "static_risk_analysis": results["static_analysis"],
+            "news_risk_analysis": results["news_analysis"],
+            "overall_risk": results["overall_risk"],
+            "notification": results["notification"],
+            "document_vectorized": results["vectorize_document"],
+            "stage_timings": run["timings"],
+            "degraded_stages": run["degraded"],
+            "stage_errors": run["errors"],
+            "trace_id": run_span.trace_id
+        })
+        
+    def reanalyze_project_risk(self, previous_results, project_data, pdf_path=None):
+        """Update a previous analyze_project_risk result after some project fields changed.
+
+        Only the changed static factors are re-scored and recombined. News is
+        re-analyzed when location, size or technology changed or the news
+        snapshot was refreshed since, reusing headline scores already computed
+        for that profile. Insights are
+        kept if still valid, otherwise left as None for stream_insights.
+        Results that came from degraded stages get a full analysis instead.
+        """
+        previous_data = previous_results["project_data"]
+        previous_static = previous_results["static_risk_analysis"]
+        if previous_results.get("degraded_stages") or "factor_total" not in previous_static:
+            return self.analyze_project_risk(project_data, pdf_path, defer_insights=True)
+
+        changed_fields = sorted(
+            field for field in set(previous_data) | set(project_data)
+            if previous_data.get(field) != project_data.get(field)
+        )
+        project_id = project_data.get("project_id", "unknown")
+        timings = {}
+
+        with span("reanalyze_project_risk", project_id=str(project_id), changed_fields=",".join(changed_fields)) as run_span:
+            # Re-ingest the document only if a new one was supplied
+            document_vectorized = previous_results.get("document_vectorized", False)
+            degraded_stages = []
+            stage_errors = {}
+            if pdf_path:
+                try:
+                    with span("stage.vectorize_document") as stage_span:
+                        document_vectorized = self.static_risk_agent.vectorize_project_document(pdf_path, project_id)
+                except Exception as e:
+                    print(f"Error vectorizing project document: {e}")
+                    document_vectorized = False
+                    degraded_stages.append("vectorize_document")
+                    stage_errors["vectorize_document"] = str(e)
+                timings["vectorize_document"] = round(stage_span.duration, 4)
+
+            # Re-score only the static factors whose fields changed
+            with span("stage.static_analysis") as stage_span:
+                static_risk_analysis, changed_factors = self.static_risk_agent.update_project_risks(
+                    previous_static, project_data, changed_fields
+                )
+            timings["static_analysis"] = round(stage_span.duration, 4)
+
+            # News depends only on the project profile and the news snapshot
+            news_risk_analysis = previous_results["news_risk_analysis"]
+            news_changed = (
+                self.news_risk_agent.profile_key(previous_data) != self.news_risk_agent.profile_key(project_data)
+                or news_risk_analysis.get("snapshot_fetched_at") is None
+                or news_risk_analysis["snapshot_fetched_at"] != self.news_risk_agent.news_store.fetched_at
+            )
+            with span("stage.overall_risk") as stage_span:
+                if news_changed:
+                    try:
+                        news_risk_analysis = self.news_risk_agent.analyze_news_risks(project_data)
+                    except Exception as e:
+                        print(f"Error analyzing news risks: {e}")
+                        news_risk_analysis = {"risk_factors": [], "risk_score": 0, "risk_level": "Low", "news_items": []}
+                        degraded_stages.append("news_analysis")
+                        stage_errors["news_analysis"] = str(e)
+                    overall_risk = self.risk_calculator_agent.calculate_overall_risk(
+                        static_risk_analysis, news_risk_analysis, generate_insights=False
+                    )
+                else:
+                    overall_risk = self.risk_calculator_agent.update_overall_risk(
+                        previous_results["overall_risk"], static_risk_analysis, news_risk_analysis, changed_factors
+                    )
+            timings["overall_risk"] = round(stage_span.duration, 4)
+
+            with span("stage.notification") as stage_span:
+                notification_result = self.notification_agent.handle_risk_notification(project_data, overall_risk)
+            timings["notification"] = round(stage_span.duration, 4)
+
+        return self._record_history({
+            "project_data": project_data,
+            "static_risk_analysis": static_risk_analysis,
+            "news_risk_analysis": news_risk_analysis,
+            "overall_risk": overall_risk,
+            "notification": notification_result,
+            "document_vectorized": document_vectorized,
+            "stage_timings": timings,
+            "degraded_stages": degraded_stages,
+            "stage_errors": stage_errors,
+            "trace_id": run_span.trace_id,
+            "changed_fields": changed_fields
+        })
+
+    def stream_insights(self, results):
+        """Yield LLM risk insights for a result from analyze_project_risk(..., defer_insights=True).
+        
+        The full text is stored in results["overall_risk"]["insights"], and in
+        the run's risk history entry, once streaming finishes.
+        """
+        overall_risk = results["overall_risk"]
+        if overall_risk.get("insights"):
+            yield overall_risk["insights"]
+            return
+            
+        chunks = []
+        for chunk in self.risk_calculator_agent.stream_risk_insights(
+            overall_risk,
+            results["static_risk_analysis"],
+            results["news_risk_analysis"]
+        ):
+            chunks.append(chunk)
+            yield chunk
+            
+        overall_risk["insights"] = "".join(chunks)
+        
+        # The run was recorded before its insights existed
+        if results.get("history_run_id") is not None:
+            try:
+                self.history.set_insights(results["history_run_id"], overall_risk["insights"])
+            except Exception as e:
+                print(f"Error recording risk insights: {e}")
+        
+    def _complete_analysis(self, project_data, static_risk_analysis, news_risk_analysis):
+        """Combine static and news analyses, notify if needed, and assemble the result."""
         # Step 3: Calculate overall risk
         overall_risk = self.risk_calculator_agent.calculate_overall_risk(
             static_risk_analysis, 
@@ -53,13 +260,85 @@ class RiskManagementSystem:
         )
         
         # Combine all results
-        return {
+        return self._record_history({
             "project_data": project_data,
             "static_risk_analysis": static_risk_analysis,
             "news_risk_analysis": news_risk_analysis,
             "overall_risk": overall_risk,
             "notification": notification_result
-        }
+        })
+        
+    def _record_history(self, results):
+        """Append a result to the risk history and return it with its "history_run_id"."""
+        try:
+            results["history_run_id"] = self.history.record(results)
+        except Exception as e:
+            print(f"Error recording risk history: {e}")
+            results["history_run_id"] = None
+        return results
+        
+    def analyze_portfolio(self, projects, max_workers=PORTFOLIO_MAX_WORKERS):
+        """Analyze many projects, yielding each result as soon as it finishes.
+        
+        Closing the generator early cancels the projects not yet started;
+        ones already running finish in the background.
+        
+        News is fetched and filtered once for the whole portfolio, and the news
+        analysis is computed once per distinct location/size/technology profile
+        and shared by every project with that profile.
+        """
+        projects = list(projects)
+        if not projects:
+            return
+            
+        # Fetch news once and filter it for every project in a single pass
+        economic_news, geopolitical_news = self.news_risk_agent.news_store.get_news()
+        keyword_sets = [self.news_risk_agent.build_keywords(project) for project in projects]
+        relevant_economic = match_keyword_sets(economic_news, keyword_sets)
+        relevant_geopolitical = match_keyword_sets(geopolitical_news, keyword_sets)
+        
+        # One news analysis per profile; the first project to need it computes it
+        news_analyses = {}
+        news_lock = threading.Lock()
+        
+        def get_news_analysis(index):
+            project_data = projects[index]
+            key = self.news_risk_agent.profile_key(project_data)
+            with news_lock:
+                future = news_analyses.get(key)
+                is_leader = future is None
+                if is_leader:
+                    future = news_analyses[key] = Future()
+                    
+            if is_leader:
+                try:
+                    future.set_result(self.news_risk_agent.analyze_news_risks(
+                        project_data,
+                        relevant_news=relevant_economic[index] + relevant_geopolitical[index]
+                    ))
+                except Exception as e:
+                    future.set_exception(e)
+            return future.result()
+            
+        def analyze(index):
+            project_data = projects[index]
+            static_risk_analysis = self.static_risk_agent.analyze_project_risks(project_data)
+            news_risk_analysis = get_news_analysis(index)
+            return self._complete_analysis(project_data, static_risk_analysis, news_risk_analysis)
+            
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="portfolio")
+        try:
+            futures = {executor.submit(analyze, index): index for index in range(len(projects))}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    project_data = projects[futures[future]]
+                    print(f"Error analyzing project {project_data.get('project_id', 'unknown')}: {e}")
+                    yield {"project_data": project_data, "error": str(e)}
+        finally:
+            # If the caller stops early, drop the projects that have not started yet
+            executor.shutdown(wait=False, cancel_futures=True)
         
     def run_crew_workflow(self, project_data, pdf_path=None):
         """Run the full CrewAI workflow for risk analysis."""
@@ -127,7 +406,7 @@ if __name__ == "__main__":
     print(f"Overall Risk Level: {result['overall_risk']['risk_level']}")
     print(f"Risk Score: {result['overall_risk']['risk_score']}")
     
-    if result['notification']['notification_sent']:
-        print(f"Notification sent to: {result['notification']['recipient']}")
+    if result['notification']['notification_queued']:
+        print(f"Notification queued for: {result['notification']['recipient']} ({result['notification']['delivery_status']})")
     else:
         print(f"No notification sent. Reason: {result['notification'].get('reason', 'Unknown')}")
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""Background service that periodically re-evaluates every registered project."""
+
+import argparse
+import json
+import threading
+import time
+
+from config import HIGH_RISK_THRESHOLD, SCHEDULER_INTERVAL, SCHEDULER_MAX_WORKERS
+from main import RiskManagementSystem
+from utils.risk_history import get_history_store
+from utils.tracing import span
+
+
+def evaluation_priority(last_score, threshold=HIGH_RISK_THRESHOLD):
+    """Sort key for a project: never-scored projects first, then by distance from the High threshold."""
+    if last_score is None:
+        return -1
+    return abs(last_score - threshold)
+
+
+class RiskScheduler:
+    """Re-run the risk analysis for all registered projects every interval seconds.
+
+    Projects whose last score is closest to HIGH_RISK_THRESHOLD are evaluated
+    first, at most max_workers at a time. Results land in the risk history
+    (and trigger notifications) through RiskManagementSystem, so readers only
+    query the history store.
+    """
+
+    def __init__(self, system=None, interval=SCHEDULER_INTERVAL, max_workers=SCHEDULER_MAX_WORKERS):
+        """Initialize the scheduler around an existing or new RiskManagementSystem."""
+        self.system = system or RiskManagementSystem()
+        self.history = self.system.history
+        self.interval = interval
+        self.max_workers = max_workers
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def prioritized_projects(self):
+        """Return registered projects ordered by evaluation priority."""
+        last_scores = {
+            overview["project_id"]: overview["risk_score"]
+            for overview in self.history.portfolio_overview()
+        }
+        projects = self.history.registered_projects()
+        projects.sort(key=lambda project: evaluation_priority(last_scores.get(str(project["project_id"]))))
+        return projects
+
+    def run_once(self):
+        """Evaluate every registered project once; returns {"evaluated", "failed", "high"} counts."""
+        projects = self.prioritized_projects()
+        summary = {"evaluated": 0, "failed": 0, "high": 0}
+        if not projects:
+            return summary
+
+        with span("scheduler.cycle", projects=len(projects)) as cycle_span:
+            # analyze_portfolio submits in list order, so the pool works through the closest calls first
+            for result in self.system.analyze_portfolio(projects, max_workers=self.max_workers):
+                if "error" in result:
+                    summary["failed"] += 1
+                    continue
+                summary["evaluated"] += 1
+                if result["overall_risk"].get("risk_level") == "High":
+                    summary["high"] += 1
+            cycle_span.set_attributes(**summary)
+
+        return summary
+
+    def _loop(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                summary = self.run_once()
+                print(f"Scheduled re-evaluation finished: {summary}")
+            except Exception as e:
+                print(f"Error in scheduled re-evaluation: {e}")
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self):
+        """Run re-evaluation cycles on a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="risk-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop after the current cycle finishes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--register", metavar="JSON_FILE", help="register the project(s) in a JSON file and exit")
+    parser.add_argument("--once", action="store_true", help="run a single re-evaluation cycle and exit")
+    parser.add_argument("--interval", type=int, default=SCHEDULER_INTERVAL)
+    parser.add_argument("--workers", type=int, default=SCHEDULER_MAX_WORKERS)
+    args = parser.parse_args()
+
+    # Registering only writes to the history store; no agents, threads or metrics server needed
+    if args.register:
+        history = get_history_store()
+        with open(args.register, "r", encoding="utf-8") as f:
+            projects = json.load(f)
+        for project_data in projects if isinstance(projects, list) else [projects]:
+            history.register_project(project_data)
+        print(f"{len(history.registered_projects())} projects registered")
+        return
+
+    scheduler = RiskScheduler(interval=args.interval, max_workers=args.workers)
+
+    if args.once:
+        print(scheduler.run_once())
+        return
+
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    finally:
+        scheduler.system.notification_agent.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Tests for alert digest delivery, retry and drop behaviour."""
+
+import os
+
+from agents.notification_agent import NotificationAgent
+from utils.alert_ledger import AlertLedger
+
+RECIPIENT = "pm@example.com"
+
+
+def _ledger(tmp_path, **kwargs):
+    return AlertLedger(path=os.path.join(tmp_path, "ledger.sqlite3"), **kwargs)
+
+
+def _claim(ledger, now):
+    ledger.add_pending(RECIPIENT, "p1", "fp", {"project_name": "P1"}, now=now)
+    assert ledger.due_recipients(0, now=now) == [RECIPIENT]
+    return ledger.claim_digest(RECIPIENT)
+
+
+def test_failed_digest_backs_off_exponentially(tmp_path):
+    ledger = _ledger(tmp_path, max_attempts=5, retry_base_delay=60, retry_max_delay=3600)
+    assert _claim(ledger, now=1000)
+
+    ledger.complete_digest(RECIPIENT, False, now=1000)
+    assert ledger.due_recipients(0, now=1059) == []
+    assert ledger.due_recipients(0, now=1060) == [RECIPIENT]
+
+    ledger.claim_digest(RECIPIENT)
+    ledger.complete_digest(RECIPIENT, False, now=1060)
+    assert ledger.due_recipients(0, now=1179) == []
+    assert ledger.due_recipients(0, now=1180) == [RECIPIENT]
+
+
+def test_alerts_are_dropped_after_max_attempts(tmp_path):
+    ledger = _ledger(tmp_path, max_attempts=3, retry_base_delay=1, retry_max_delay=1)
+    now = 1000
+    assert _claim(ledger, now)
+
+    for _ in range(3):
+        ledger.complete_digest(RECIPIENT, False, now=now)
+        now += 10
+        if ledger.due_recipients(0, now=now):
+            ledger.claim_digest(RECIPIENT)
+
+    assert ledger.due_recipients(0, now=now + 3600) == []
+    assert not ledger.is_duplicate("p1", "fp", now=now)
+
+
+def test_permanent_failure_drops_alerts_at_once(tmp_path):
+    ledger = _ledger(tmp_path)
+    assert _claim(ledger, now=1000)
+
+    ledger.complete_digest(RECIPIENT, False, now=1000, permanent=True)
+
+    assert ledger.due_recipients(0, now=10 ** 9) == []
+
+
+def test_success_records_sent_and_resets_backoff(tmp_path):
+    ledger = _ledger(tmp_path, retry_base_delay=60)
+    assert _claim(ledger, now=1000)
+    ledger.complete_digest(RECIPIENT, False, now=1000)
+    assert ledger.due_recipients(0, now=1060) == [RECIPIENT]
+    ledger.claim_digest(RECIPIENT)
+
+    ledger.complete_digest(RECIPIENT, True, now=1060)
+
+    assert ledger.is_duplicate("p1", "fp", now=1061)
+    ledger.add_pending(RECIPIENT, "p2", "fp2", {"project_name": "P2"}, now=1070)
+    assert ledger.due_recipients(0, now=1070) == [RECIPIENT]
+
+
+class FailingSender:
+    """Email sender whose every delivery fails."""
+
+    def __init__(self):
+        self.deliveries = 0
+
+    def is_configured(self):
+        return True
+
+    def queue_risk_digest(self, recipient, alerts, on_complete=None):
+        self.deliveries += 1
+        on_complete(False, False)
+        return self.deliveries
+
+    def get_delivery_status(self, delivery_id):
+        return {"status": "failed"}
+
+
+def test_failing_sender_is_not_retried_on_every_flush(tmp_path):
+    sender = FailingSender()
+    agent = NotificationAgent(email_sender=sender, ledger=_ledger(tmp_path), digest_interval=0)
+    risk = {"risk_level": "High", "risk_score": 80, "risk_factors": [{"name": "Budget Problem"}]}
+
+    result = agent.handle_risk_notification({"project_id": "p1", "project_manager_email": RECIPIENT}, risk)
+    for _ in range(5):
+        agent.flush_digests()
+
+    assert result["notification_queued"] is True
+    assert result["delivery_status"] == "queued"
+    assert "notification_sent" not in result
+    assert sender.deliveries == 1
@@ -0,0 +1,44 @@
+"""Tests for BM25 headline ranking."""
+
+from utils.headline_ranker import HeadlineRanker
+
+
+def _snapshot(tariff_count, total=200):
+    titles = [f"Tariff dispute deepens between trade partners, day {i}" for i in range(tariff_count)]
+    titles += [f"Local sports team wins match number {i}" for i in range(total - tariff_count)]
+    return [{"title": title, "source": "Wire"} for title in titles]
+
+
+def test_dominant_keyword_is_still_selected():
+    # The more headlines carry a keyword, the lower its IDF; they must not fall out of the selection
+    for tariff_count in (20, 30, 60, 150):
+        news = _snapshot(tariff_count)
+        ranker = HeadlineRanker([item["title"] for item in news])
+        relevant = [item for item in news if "Tariff" in item["title"]]
+
+        _, selected = ranker.rank(["tariff", "currency"], relevant, top_k=10)
+
+        assert len(selected) == 10, tariff_count
+
+
+def test_weak_matches_are_dropped_next_to_strong_ones():
+    news = [
+        {"title": "Currency swings hit exporters", "source": "A"},
+        {"title": "Vietnam raises tariff on solar panels imported from Vietnam", "source": "B"},
+    ]
+    ranker = HeadlineRanker([item["title"] for item in news] + [f"Filler story {i}" for i in range(20)])
+
+    ranked, selected = ranker.rank({"currency": 1.0, "vietnam": 2.0, "tariff": 1.0}, news, top_k=10, min_ratio=0.6)
+
+    assert [item["source"] for item in ranked] == ["B", "A"]
+    assert [item["source"] for item in selected] == ["B"]
+
+
+def test_nothing_is_selected_without_a_match():
+    news = [{"title": "Local sports team wins", "source": "A"}]
+    ranker = HeadlineRanker([item["title"] for item in news])
+
+    ranked, selected = ranker.rank(["tariff"], news)
+
+    assert ranked[0]["relevance"] == 0
+    assert selected == []
@@ -0,0 +1,53 @@
+"""Tests that incremental re-scoring matches a full recompute."""
+
+import random
+
+import pytest
+
+from agents.risk_calculator_agent import RiskCalculatorAgent
+from agents.static_risk_agent import StaticRiskAgent
+from utils.static_risk_scoring import STATIC_RISK_CATEGORIES
+
+VALUES = [None, "", "1", "50", "500", "India", "USA", "AI", "yes", "no", "cloud"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_update_matches_full_recompute(seed):
+    static_agent = StaticRiskAgent()
+    calculator = RiskCalculatorAgent()
+    fields = ["project_name"] + STATIC_RISK_CATEGORIES
+    rng = random.Random(seed)
+
+    for _ in range(100):
+        project_data = {field: rng.choice(VALUES) for field in rng.sample(fields, len(fields))}
+        news = {
+            "risk_score": 50,
+            "risk_factors": [{"name": f"News {i}", "score": rng.choice([1, 2, 3, 5, 8])} for i in range(4)]
+        }
+        static = static_agent.analyze_project_risks(project_data)
+        overall = calculator.calculate_overall_risk(static, news, generate_insights=False)
+        overall["insights"] = "previous insights"
+
+        changed_fields = rng.sample(STATIC_RISK_CATEGORIES, 2)
+        new_data = dict(project_data)
+        for field in changed_fields:
+            new_data[field] = rng.choice(VALUES)
+
+        updated_static, changed_factors = static_agent.update_project_risks(static, new_data, changed_fields)
+        updated = calculator.update_overall_risk(overall, updated_static, news, changed_factors)
+        full_static = static_agent.analyze_project_risks(new_data)
+        full = calculator.calculate_overall_risk(full_static, news, generate_insights=False)
+
+        assert updated_static == full_static
+        # Same order, including among equal scores
+        assert updated["risk_factors"] == full["risk_factors"]
+        assert updated["risk_score"] == full["risk_score"]
+        assert updated["risk_level"] == full["risk_level"]
+
+        # Insights survive only if they would come from exactly the same prompt
+        same_prompt = calculator._build_insights_prompt(
+            full["risk_score"], full["risk_level"], full["risk_factors"], full_static, news
+        ) == calculator._build_insights_prompt(
+            overall["risk_score"], overall["risk_level"], overall["risk_factors"], static, news
+        )
+        assert (updated["insights"] == "previous insights") == same_prompt
@@ -0,0 +1,47 @@
+"""Tests for news headline scoring in NewsRiskAgent."""
+
+import pytest
+
+from agents.news_risk_agent import NewsRiskAgent
+from benchmarks.fakes import FakeGenerativeModel
+
+PROJECT = {"project_location": "Vietnam", "project_size": "Large", "technology": "Solar"}
+
+
+class FailingModel:
+    """Fails the first failures calls, then answers like FakeGenerativeModel."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self._model = FakeGenerativeModel(latency=0)
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("quota exhausted")
+        return self._model.generate_content(prompt)
+
+
+def _headlines(count):
+    return [{"title": f"Vietnam tariff story {i}", "source": "Wire"} for i in range(count)]
+
+
+def test_failed_batch_raises_instead_of_scoring_low():
+    agent = NewsRiskAgent()
+    agent.model = FailingModel(failures=100)
+
+    with pytest.raises(RuntimeError):
+        agent.score_news_items(PROJECT, _headlines(3))
+
+
+def test_failed_batches_are_not_memoized():
+    agent = NewsRiskAgent()
+    agent.model = FailingModel(failures=1)
+
+    with pytest.raises(RuntimeError):
+        agent.score_news_items(PROJECT, _headlines(3))
+    risks = agent.score_news_items(PROJECT, _headlines(3))
+
+    assert len(risks) == 3
+    assert agent.model.calls == 2
@@ -0,0 +1,54 @@
+"""Tests for per-source headline extraction."""
+
+from utils.news_scraper import parse_headlines
+
+CNN_PAGE = """
+<html><body>
+<h2>Section heading that is not a story</h2>
+<a class="container__link" href="/2026/10/18/world/tariff-story"><img src="x.jpg"></a>
+<a class="container__link" href="/2026/10/18/world/tariff-story">
+  <span class="container__headline-text">Tariff row escalates between trade partners</span>
+</a>
+</body></html>
+"""
+
+BBC_PAGE = """
+<html><body>
+<a data-testid="internal-link" href="/news/articles/abc">
+  <div><h2 data-testid="card-headline">Currency slides after central bank move</h2></div>
+</a>
+<h3>Most read: unrelated panel title</h3>
+</body></html>
+"""
+
+
+def test_source_profile_reads_headline_container():
+    news = parse_headlines(CNN_PAGE, {"domain": "cnn.com"})
+
+    assert [(item["title"], item["link"]) for item in news] == [
+        ("Tariff row escalates between trade partners", "https://cnn.com/2026/10/18/world/tariff-story")
+    ]
+
+
+def test_title_inside_link_container():
+    news = parse_headlines(BBC_PAGE, {"domain": "bbc.com"})
+
+    assert [(item["title"], item["link"]) for item in news] == [
+        ("Currency slides after central bank move", "https://bbc.com/news/articles/abc")
+    ]
+
+
+def test_falls_back_to_default_profile_when_markup_changes():
+    page = "<html><body><h3><a href='/story'>Import ban announced on solar panels</a></h3></body></html>"
+
+    news = parse_headlines(page, {"domain": "reuters.com"})
+
+    assert [item["title"] for item in news] == ["Import ban announced on solar panels"]
+
+
+def test_unlisted_source_uses_default_profile():
+    page = "<html><body><h2>Exchange rate hits record low</h2><p>Not a headline at all here</p></body></html>"
+
+    news = parse_headlines(page, {"domain": "example.com"})
+
+    assert [item["title"] for item in news] == ["Exchange rate hits record low"]
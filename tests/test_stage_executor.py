@@ -0,0 +1,55 @@
+"""Tests for StageGraph degradation and fallbacks."""
+
+import threading
+import time
+
+import pytest
+
+from utils.stage_executor import StageGraph
+
+
+def _fail(_):
+    raise RuntimeError("quota exhausted")
+
+
+def test_failed_stage_uses_fallback_and_is_marked_degraded():
+    graph = StageGraph()
+    graph.add_stage("news", _fail, fallback=lambda _: {"risk_score": 0})
+    graph.add_stage("overall", lambda r: r["news"]["risk_score"] + 1, depends_on=["news"])
+
+    run = graph.run()
+
+    assert run["degraded"] == ["news"]
+    assert run["errors"]["news"] == "RuntimeError: quota exhausted"
+    assert run["results"] == {"news": {"risk_score": 0}, "overall": 1}
+
+
+def test_timed_out_stage_is_abandoned():
+    release = threading.Event()
+    graph = StageGraph()
+    graph.add_stage("slow", lambda _: release.wait(5), timeout=0.1, fallback=lambda _: "fallback")
+    graph.add_stage("fast", lambda _: "done")
+
+    started = time.perf_counter()
+    run = graph.run()
+    release.set()
+
+    assert time.perf_counter() - started < 2
+    assert run["degraded"] == ["slow"]
+    assert run["errors"]["slow"].startswith("Timed out")
+    assert run["results"] == {"slow": "fallback", "fast": "done"}
+
+
+def test_failing_fallback_gives_none():
+    graph = StageGraph()
+    graph.add_stage("stage", _fail, fallback=_fail)
+
+    run = graph.run()
+
+    assert run["results"] == {"stage": None}
+    assert "fallback failed" in run["errors"]["stage"]
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        StageGraph().add_stage("overall", lambda r: None, depends_on=["missing"])
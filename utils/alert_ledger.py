@@ -0,0 +1,209 @@
+"""Persistent ledger of sent risk alerts, used for deduplication and digest batching."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import (
+    ALERT_LEDGER_PATH, ALERT_SUPPRESSION_WINDOW, ALERT_SCORE_BUCKET,
+    ALERT_RETRY_BASE_DELAY, ALERT_RETRY_MAX_DELAY, ALERT_MAX_DELIVERY_ATTEMPTS
+)
+
+
+def risk_fingerprint(risk_analysis, score_bucket=ALERT_SCORE_BUCKET):
+    """Fingerprint what an alert says: level, score band and top risk factors.
+
+    Re-running an analysis that produces the same picture gives the same
+    fingerprint; a new top factor or a move to another score band does not.
+    """
+    top_factors = sorted(factor.get("name", "") for factor in risk_analysis.get("risk_factors", [])[:5])
+    band = int(risk_analysis.get("risk_score", 0) // score_bucket) if score_bucket else 0
+    content = json.dumps([risk_analysis.get("risk_level"), band, top_factors])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class AlertLedger:
+    """SQLite-backed record of sent alerts plus alerts waiting for the next digest.
+
+    A claimed digest moves its alerts from pending_alerts to sending_alerts;
+    they only count as sent once complete_digest reports a successful
+    delivery. After a failed delivery they go back to pending and the
+    recipient is not due again until an exponentially growing delay has
+    passed; after max_attempts failures, or a permanent one, they are dropped.
+    """
+
+    def __init__(self, path=ALERT_LEDGER_PATH, suppression_window=ALERT_SUPPRESSION_WINDOW,
+                 max_attempts=ALERT_MAX_DELIVERY_ATTEMPTS, retry_base_delay=ALERT_RETRY_BASE_DELAY,
+                 retry_max_delay=ALERT_RETRY_MAX_DELAY):
+        """Open (or create) the ledger database."""
+        self.path = path
+        self.suppression_window = suppression_window
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sent_alerts (
+                project_id TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                sent_at REAL NOT NULL,
+                PRIMARY KEY (project_id, fingerprint)
+            );
+            CREATE TABLE IF NOT EXISTS pending_alerts (
+                recipient TEXT NOT NULL,
+                project_id TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                queued_at REAL NOT NULL,
+                PRIMARY KEY (recipient, project_id)
+            );
+            CREATE TABLE IF NOT EXISTS sending_alerts (
+                recipient TEXT NOT NULL,
+                project_id TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                queued_at REAL NOT NULL,
+                PRIMARY KEY (recipient, project_id)
+            );
+            CREATE TABLE IF NOT EXISTS digests (
+                recipient TEXT PRIMARY KEY,
+                last_sent REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS digest_failures (
+                recipient TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                next_attempt REAL NOT NULL
+            );
+        """)
+
+        # Deliveries in progress when the process stopped never completed; send them again
+        with self._conn:
+            self._return_to_pending()
+
+    def is_duplicate(self, project_id, fingerprint, now=None):
+        """Return True if this alert was sent within the suppression window or is being sent.
+
+        A pending alert is not a duplicate: adding it again just replaces the
+        queued copy, and lets a digest whose delivery failed go out again.
+        """
+        now = now or time.time()
+        with self._lock:
+            sent = self._conn.execute(
+                "SELECT 1 FROM sent_alerts WHERE project_id = ? AND fingerprint = ? AND sent_at > ?",
+                (project_id, fingerprint, now - self.suppression_window)
+            ).fetchone()
+            sending = self._conn.execute(
+                "SELECT 1 FROM sending_alerts WHERE project_id = ? AND fingerprint = ?",
+                (project_id, fingerprint)
+            ).fetchone()
+        return sent is not None or sending is not None
+
+    def add_pending(self, recipient, project_id, fingerprint, payload, now=None):
+        """Queue an alert for the recipient's next digest, replacing an older one for the same project."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pending_alerts (recipient, project_id, fingerprint, payload, queued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (recipient, project_id, fingerprint, json.dumps(payload), now or time.time())
+            )
+            self._conn.commit()
+
+    def due_recipients(self, interval, now=None):
+        """Return recipients with pending alerts whose last digest is at least interval seconds old.
+
+        Recipients with a digest still being delivered, or waiting to retry a
+        failed one, are not due.
+        """
+        now = now or time.time()
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT DISTINCT p.recipient FROM pending_alerts p
+                LEFT JOIN digests d ON d.recipient = p.recipient
+                LEFT JOIN digest_failures f ON f.recipient = p.recipient
+                WHERE (d.last_sent IS NULL OR d.last_sent <= ?)
+                    AND (f.next_attempt IS NULL OR f.next_attempt <= ?)
+                    AND p.recipient NOT IN (SELECT recipient FROM sending_alerts)
+            """, (now - interval, now)).fetchall()
+        return [row[0] for row in rows]
+
+    def claim_digest(self, recipient):
+        """Move the recipient's pending alerts to sending, in one transaction.
+
+        Returns the alert payloads in the order they were queued. Report the
+        delivery outcome with complete_digest.
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT payload FROM pending_alerts WHERE recipient = ? ORDER BY queued_at", (recipient,)
+            ).fetchall()
+            if not rows:
+                return []
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sending_alerts SELECT * FROM pending_alerts WHERE recipient = ?", (recipient,)
+            )
+            self._conn.execute("DELETE FROM pending_alerts WHERE recipient = ?", (recipient,))
+        return [json.loads(payload) for payload, in rows]
+
+    def complete_digest(self, recipient, success, now=None, permanent=False):
+        """Record the outcome of delivering the recipient's claimed alerts.
+
+        On success they count as sent. A failed delivery returns them to
+        pending with the recipient's next attempt backed off, unless it was
+        permanent or the attempts are used up, in which case they are dropped.
+        """
+        now = now or time.time()
+        with self._lock, self._conn:
+            if not success:
+                self._record_failure(recipient, permanent, now)
+                return
+            self._conn.execute("DELETE FROM digest_failures WHERE recipient = ?", (recipient,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sent_alerts (project_id, fingerprint, recipient, sent_at) "
+                "SELECT project_id, fingerprint, recipient, ? FROM sending_alerts WHERE recipient = ?",
+                (now, recipient)
+            )
+            self._conn.execute("DELETE FROM sending_alerts WHERE recipient = ?", (recipient,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO digests (recipient, last_sent) VALUES (?, ?)", (recipient, now)
+            )
+
+    def _record_failure(self, recipient, permanent, now):
+        """Back off the recipient's next digest, or drop its claimed alerts."""
+        row = self._conn.execute("SELECT attempts FROM digest_failures WHERE recipient = ?", (recipient,)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+
+        if permanent or attempts >= self.max_attempts:
+            dropped = self._conn.execute("DELETE FROM sending_alerts WHERE recipient = ?", (recipient,)).rowcount
+            self._conn.execute("DELETE FROM digest_failures WHERE recipient = ?", (recipient,))
+            reason = "the server rejected it" if permanent else f"{attempts} failed deliveries"
+            print(f"Dropping {dropped} alert(s) for {recipient} after {reason}")
+            return
+
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempts - 1))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO digest_failures (recipient, attempts, next_attempt) VALUES (?, ?, ?)",
+            (recipient, attempts, now + delay)
+        )
+        self._return_to_pending(recipient)
+
+    def _return_to_pending(self, recipient=None):
+        """Move claimed alerts back to pending; a newer pending alert for the same project wins."""
+        where, params = ("WHERE recipient = ?", (recipient,)) if recipient is not None else ("", ())
+        self._conn.execute(f"INSERT OR IGNORE INTO pending_alerts SELECT * FROM sending_alerts {where}", params)
+        self._conn.execute(f"DELETE FROM sending_alerts {where}", params)
+
+    def prune(self, now=None):
+        """Drop sent-alert records older than the suppression window."""
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM sent_alerts WHERE sent_at <= ?", (now - self.suppression_window,))
+            self._conn.commit()
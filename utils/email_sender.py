@@ -1,30 +1,142 @@
 """Utilities for sending email notifications."""
 
+import itertools
+import queue
 import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from config import SMTP_SERVER, SMTP_PORT, EMAIL_SENDER, EMAIL_PASSWORD
+from config import (
+    SMTP_SERVER, SMTP_PORT, SMTP_USE_TLS, SMTP_TIMEOUT, SMTP_POOL_SIZE, SMTP_IDLE_TIMEOUT,
+    EMAIL_SENDER, EMAIL_PASSWORD, EMAIL_MAX_RETRIES, EMAIL_RETRY_BACKOFF, EMAIL_DELIVERY_HISTORY
+)
+from utils.tracing import get_tracer, span
+
+
+class SMTPConnectionPool:
+    """Bounded pool of reusable, authenticated SMTP connections."""
+
+    def __init__(self, server, port, sender, password, use_tls=SMTP_USE_TLS,
+                 max_connections=SMTP_POOL_SIZE, timeout=SMTP_TIMEOUT, idle_timeout=SMTP_IDLE_TIMEOUT):
+        """Initialize the pool; connections are opened on demand."""
+        self.server = server
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+
+        self._idle = queue.LifoQueue()  # (connection, last used)
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self.connections_opened = 0
+
+    def _connect(self):
+        """Open a new connection, upgrading to TLS and logging in where supported."""
+        connection = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            connection.ehlo()
+            if self.use_tls:
+                connection.starttls()
+                connection.ehlo()
+            if self.password and connection.has_extn("auth"):
+                connection.login(self.sender, self.password)
+        except Exception:
+            self._close(connection)
+            raise
+        self.connections_opened += 1
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        """Close a connection, ignoring errors from an already dead socket."""
+        try:
+            connection.quit()
+        except Exception:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def acquire(self):
+        """Return a live connection, reusing an idle one when possible."""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    connection, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+
+                # Servers drop idle sessions, so check old connections before reuse
+                if time.monotonic() - last_used < self.idle_timeout:
+                    try:
+                        if connection.noop()[0] == 250:
+                            return connection
+                    except Exception:
+                        pass
+                self._close(connection)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection, broken=False):
+        """Return a connection to the pool, or close it if it failed."""
+        if broken:
+            self._close(connection)
+        else:
+            self._idle.put((connection, time.monotonic()))
+        self._slots.release()
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(connection)
+
 
 class EmailSender:
-    def __init__(self):
-        """Initialize the email sender with SMTP configuration."""
-        self.server = SMTP_SERVER
-        self.port = SMTP_PORT
-        self.sender = EMAIL_SENDER
-        self.password = EMAIL_PASSWORD
-        
-    def send_risk_notification(self, recipient, project_name, risk_score, risk_factors):
-        """Send a high-risk notification email to the project manager."""
-        if not self.sender or not self.password:
-            print("Email credentials not configured. Skipping notification.")
-            return False
-            
+    def __init__(self, server=SMTP_SERVER, port=SMTP_PORT, sender=EMAIL_SENDER, password=EMAIL_PASSWORD,
+                 use_tls=SMTP_USE_TLS, max_connections=SMTP_POOL_SIZE, max_retries=EMAIL_MAX_RETRIES,
+                 retry_backoff=EMAIL_RETRY_BACKOFF, delivery_history=EMAIL_DELIVERY_HISTORY):
+        """Initialize the email sender with SMTP configuration.
+
+        Queued emails are delivered by one worker per pooled connection. Only
+        the last delivery_history finished deliveries keep a status record.
+        """
+        self.server = server
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.delivery_history = delivery_history
+
+        self.pool = SMTPConnectionPool(server, port, sender, password, use_tls=use_tls, max_connections=max_connections)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="smtp")
+        self._deliveries = {}
+        self._delivery_ids = itertools.count(1)
+        self._finished = deque()  # Finished delivery ids, oldest first
+        self._lock = threading.Lock()
+
+    def is_configured(self):
+        """Return True if sender credentials are set."""
+        return bool(self.sender and self.password)
+
+    def build_risk_notification(self, recipient, project_name, risk_score, risk_factors):
+        """Build the high-risk notification message."""
         # Create message
         message = MIMEMultipart()
         message["From"] = self.sender
         message["To"] = recipient
         message["Subject"] = f"HIGH RISK ALERT: Project {project_name}"
-        
+
         # Email body
         body = f"""
         <html>
@@ -32,34 +144,209 @@ class EmailSender:
             <h2>Project Risk Alert</h2>
             <p>The risk analysis system has identified <strong>HIGH RISK</strong> for project: <strong>{project_name}</strong>.</p>
             <p>Current risk score: <strong>{risk_score}</strong> </p>
-            
+
             <h3>Risk Factors:</h3>
             <ul>
         """
-        
+
         # Add risk factors
         for factor in risk_factors:
             body += f"<li><strong>{factor['name']}:</strong> {factor['description']}</li>"
-            
+
         body += """
             </ul>
-            
+
             <p>Please review the project status and take appropriate action.</p>
             <p>This is an automated message from the Risk Management System.</p>
         </body>
         </html>
         """
-        
+
         # Attach HTML content
         message.attach(MIMEText(body, "html"))
-        
-        # Send email
-        try:
-            with smtplib.SMTP(self.server, self.port) as server:
-                server.starttls()
-                server.login(self.sender, self.password)
-                server.send_message(message)
-            return True
-        except Exception as e:
-            print(f"Failed to send email: {e}")
-            return False
\ No newline at end of file
+        return message
+
+    def build_risk_digest(self, recipient, alerts):
+        """Build one message covering several high-risk projects.
+
+        alerts is a list of dicts with project_name, risk_score and risk_factors;
+        a single alert gets the regular notification format.
+        """
+        if len(alerts) == 1:
+            alert = alerts[0]
+            return self.build_risk_notification(
+                recipient, alert["project_name"], alert["risk_score"], alert["risk_factors"]
+            )
+
+        message = MIMEMultipart()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = f"HIGH RISK ALERT: {len(alerts)} projects"
+
+        body = f"""
+        <html>
+        <body>
+            <h2>Project Risk Digest</h2>
+            <p>The risk analysis system has identified <strong>HIGH RISK</strong> for {len(alerts)} projects.</p>
+        """
+
+        for alert in alerts:
+            body += f"<h3>{alert['project_name']} (risk score: {alert['risk_score']})</h3><ul>"
+            for factor in alert["risk_factors"]:
+                body += f"<li><strong>{factor['name']}:</strong> {factor['description']}</li>"
+            body += "</ul>"
+
+        body += """
+            <p>Please review the project statuses and take appropriate action.</p>
+            <p>This is an automated message from the Risk Management System.</p>
+        </body>
+        </html>
+        """
+
+        message.attach(MIMEText(body, "html"))
+        return message
+
+    def _deliver(self, message):
+        """Send a message over a pooled connection, retrying with backoff.
+
+        Returns (success, attempts, error, permanent).
+        """
+        with span("smtp.send", recipient=message["To"]) as smtp_span:
+            success, attempts, error, permanent = self._deliver_with_retries(message)
+            smtp_span.set_attributes(success=success, attempts=attempts)
+            if error:
+                smtp_span.set_attribute("error", error)
+        get_tracer().metrics.inc("risk_emails_total", status="sent" if success else "failed")
+        return success, attempts, error, permanent
+
+    def _deliver_with_retries(self, message):
+        """Try to send a message up to max_retries times; returns (success, attempts, error, permanent).
+
+        Connection errors and 4xx replies are retried; 5xx replies (sender
+        refused, message rejected) and refused recipients fail immediately,
+        with permanent set since sending the message again will not help.
+        """
+        error = None
+        for attempt in range(1, self.max_retries + 1):
+            connection = None
+            try:
+                connection = self.pool.acquire()
+                connection.send_message(message)
+                self.pool.release(connection)
+                return True, attempt, None, False
+            except smtplib.SMTPRecipientsRefused as e:
+                # Retrying will not help a rejected address
+                self.pool.release(connection)
+                return False, attempt, str(e), True
+            except Exception as e:
+                error = str(e)
+                is_reply = isinstance(e, smtplib.SMTPResponseException)
+                if connection is not None:
+                    # The session survives an error reply (smtplib resets it), but not a socket error
+                    self.pool.release(connection, broken=not is_reply)
+                if is_reply and e.smtp_code >= 500:
+                    print(f"Failed to send email: {error}")
+                    return False, attempt, error, True
+                if attempt < self.max_retries:
+                    delay = self.retry_backoff * 2 ** (attempt - 1)
+                    print(f"Failed to send email (attempt {attempt}), retrying in {delay}s: {e}")
+                    time.sleep(delay)
+
+        print(f"Failed to send email: {error}")
+        return False, attempt, error, False
+
+    def send_risk_notification(self, recipient, project_name, risk_score, risk_factors):
+        """Send a high-risk notification email to the project manager and wait for the result."""
+        if not self.is_configured():
+            print("Email credentials not configured. Skipping notification.")
+            return False
+
+        message = self.build_risk_notification(recipient, project_name, risk_score, risk_factors)
+        success, _, _, _ = self._deliver(message)
+        return success
+
+    def queue_message(self, message, on_complete=None):
+        """Queue a prepared message for background delivery and return its delivery id.
+
+        on_complete(success, permanent), if given, is called from the delivery
+        worker once the message is sent or has finally failed; permanent is
+        True if the server rejected it outright.
+        """
+        with self._lock:
+            delivery_id = next(self._delivery_ids)
+            self._deliveries[delivery_id] = {
+                "status": "queued",
+                "recipient": message["To"],
+                "attempts": 0,
+                "error": None,
+                "queued_at": time.time(),
+                "sent_at": None
+            }
+
+        def run():
+            with self._lock:
+                self._deliveries[delivery_id]["status"] = "sending"
+            success, attempts, error, permanent = self._deliver(message)
+            with self._lock:
+                self._deliveries[delivery_id].update({
+                    "status": "sent" if success else "failed",
+                    "attempts": attempts,
+                    "error": error,
+                    "sent_at": time.time() if success else None
+                })
+                # Keep status records for recent deliveries only
+                self._finished.append(delivery_id)
+                while len(self._finished) > self.delivery_history:
+                    del self._deliveries[self._finished.popleft()]
+            if on_complete is not None:
+                try:
+                    on_complete(success, permanent)
+                except Exception as e:
+                    print(f"Error in email delivery callback: {e}")
+
+        self._executor.submit(run)
+        return delivery_id
+
+    def queue_risk_notification(self, recipient, project_name, risk_score, risk_factors):
+        """Queue a high-risk notification for background delivery.
+
+        Returns a delivery id for get_delivery_status, or None if email is
+        not configured.
+        """
+        if not self.is_configured():
+            print("Email credentials not configured. Skipping notification.")
+            return None
+
+        message = self.build_risk_notification(recipient, project_name, risk_score, risk_factors)
+        return self.queue_message(message)
+
+    def queue_risk_digest(self, recipient, alerts, on_complete=None):
+        """Queue one email covering several alerts; returns a delivery id or None if not configured."""
+        if not self.is_configured():
+            print("Email credentials not configured. Skipping notification.")
+            return None
+
+        return self.queue_message(self.build_risk_digest(recipient, alerts), on_complete=on_complete)
+
+    def get_delivery_status(self, delivery_id):
+        """Return a copy of the delivery record ("queued", "sending", "sent" or "failed")."""
+        with self._lock:
+            record = self._deliveries.get(delivery_id)
+            return dict(record) if record else None
+
+    def wait_for_deliveries(self, timeout=None):
+        """Block until every queued email is sent or failed; return False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pending = any(record["status"] in ("queued", "sending") for record in self._deliveries.values())
+            if not pending:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def close(self):
+        """Finish queued deliveries and close pooled connections."""
+        self._executor.shutdown(wait=True)
+        self.pool.close()
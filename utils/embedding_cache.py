@@ -0,0 +1,61 @@
+"""Persistent cache for text embeddings."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from config import EMBEDDING_CACHE_PATH
+
+
+def embedding_key(model_name, task_type, text):
+    """Build the content-hash key for a text embedded with a given model and task."""
+    content = f"{model_name}\0{task_type}\0{text}"
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed store of embeddings keyed on a hash of their input text."""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        """Open (or create) the cache database."""
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """Return a dict of key -> embedding for the keys present in the cache."""
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+        return found
+
+    def set_many(self, items):
+        """Store (key, embedding) pairs."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+            )
+            self._conn.commit()
@@ -0,0 +1,82 @@
+"""SimHash clustering of near-duplicate news headlines."""
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+from config import NEWS_DEDUP_MAX_DISTANCE
+from utils.keyword_matcher import tokenize
+
+SIMHASH_BITS = 64
+
+# Words too common to say anything about which story a headline is
+_STOPWORDS = frozenset(
+    "a an and as at by for from in into is are of on over the to with after amid".split()
+)
+
+_BIT_MASKS = 1 << np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+def _features(title):
+    """Return the words of a title, stopwords removed.
+
+    Word pairs and character shingles were tried too; on headline-length
+    text they spread reworded copies further apart than plain words do.
+    """
+    # Drop dots so "U.S." and "US" are the same word
+    return [token for token in tokenize(title.replace(".", "")) if token not in _STOPWORDS]
+
+
+@lru_cache(maxsize=4096)
+def simhash(title):
+    """Return the 64-bit SimHash of a headline's words; cached since headlines recur across analyses."""
+    features = _features(title)
+    if not features:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little") for feature in features],
+        dtype=np.uint64
+    )
+    # +1 for each feature with the bit set, -1 otherwise; keep the bits with a positive total
+    votes = ((hashes[:, None] & _BIT_MASKS) != 0).sum(axis=0) * 2 - len(features)
+    return int((_BIT_MASKS[votes > 0]).sum())
+
+
+def hamming_distance(first, second):
+    return (first ^ second).bit_count()
+
+
+def cluster_headlines(news_list, max_distance=NEWS_DEDUP_MAX_DISTANCE):
+    """Collapse near-identical headlines into one representative per story.
+
+    Headlines whose SimHashes differ in at most max_distance bits join the
+    cluster of the first such headline, in input order. Each representative
+    is a copy of that first item with "sources" (distinct outlets, in order
+    seen), "source_count" and "duplicates" (the other items) added.
+
+    Headlines are short, so useful thresholds are too wide for band-based
+    candidate lookup to prune anything; each headline is compared with every
+    representative, which takes a few milliseconds for a few hundred items.
+    """
+    fingerprints = []
+    clusters = []
+
+    for news in news_list:
+        fingerprint = simhash(news["title"])
+        match = next(
+            (index for index, other in enumerate(fingerprints) if hamming_distance(other, fingerprint) <= max_distance),
+            None
+        )
+
+        if match is None:
+            fingerprints.append(fingerprint)
+            clusters.append(dict(news, sources=[news["source"]], source_count=1, duplicates=[]))
+            continue
+
+        representative = clusters[match]
+        representative["duplicates"].append(news)
+        if news["source"] not in representative["sources"]:
+            representative["sources"].append(news["source"])
+            representative["source_count"] = len(representative["sources"])
+
+    return clusters
@@ -0,0 +1,86 @@
+"""BM25 relevance ranking of news headlines against a project's keywords."""
+
+import math
+import threading
+
+from config import NEWS_MAX_SCORED_ITEMS, NEWS_RELEVANCE_MIN_RATIO
+from utils.keyword_matcher import tokenize
+
+
+def _count_phrase(tokens, phrase):
+    """Count contiguous occurrences of a token tuple in a token list."""
+    if len(phrase) == 1:
+        return tokens.count(phrase[0])
+    return sum(1 for i in range(len(tokens) - len(phrase) + 1) if tuple(tokens[i:i + len(phrase)]) == phrase)
+
+
+class HeadlineRanker:
+    """Score headlines with BM25, taking term statistics from a corpus of headlines.
+
+    Build one per news snapshot: a keyword that appears in many of the day's
+    headlines (say "currency" during a currency story) counts for little,
+    while a rarer project keyword such as the location counts for more.
+    Multi-word keywords are scored as phrases, matching KeywordMatcher, so
+    "exchange rate" says nothing about a headline on interest rates.
+    """
+
+    def __init__(self, corpus_titles, k1=1.2, b=0.75):
+        """Index the corpus; k1 and b are the usual BM25 parameters."""
+        self.k1 = k1
+        self.b = b
+        self._corpus = [tokenize(title) for title in corpus_titles]
+        self.document_count = len(self._corpus)
+        self.average_length = sum(map(len, self._corpus)) / self.document_count if self._corpus else 1.0
+        self._idf = {}
+        self._lock = threading.Lock()
+
+    def idf(self, phrase):
+        """Inverse document frequency of a token tuple, never negative; computed once per phrase."""
+        with self._lock:
+            idf = self._idf.get(phrase)
+        if idf is None:
+            frequency = sum(1 for tokens in self._corpus if _count_phrase(tokens, phrase))
+            idf = math.log(1 + (self.document_count - frequency + 0.5) / (frequency + 0.5))
+            with self._lock:
+                self._idf[phrase] = idf
+        return idf
+
+    def score(self, query_phrases, title):
+        """BM25 score of a title for {phrase (token tuple): weight}."""
+        tokens = tokenize(title)
+        if not tokens:
+            return 0.0
+        length_norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.average_length)
+        score = 0.0
+        for phrase, weight in query_phrases.items():
+            count = _count_phrase(tokens, phrase)
+            if count:
+                score += weight * self.idf(phrase) * count * (self.k1 + 1) / (count + length_norm)
+        return score
+
+    def rank(self, keywords, news_list, top_k=NEWS_MAX_SCORED_ITEMS, min_ratio=NEWS_RELEVANCE_MIN_RATIO):
+        """Order headlines by relevance to the keywords and pick the ones worth scoring.
+        
+        keywords is a list, or a dict of keyword to weight. Returns (ranked,
+        selected): every item as a copy with a "relevance" score, most
+        relevant first, and the top_k of those matching a keyword and scoring
+        at least min_ratio of the best score. Ties keep input order.
+        
+        The cut-off is relative because IDF comes from the same snapshot: a
+        keyword that dominates the day's news scores low in absolute terms,
+        and those are the headlines that matter most.
+        """
+        if not isinstance(keywords, dict):
+            keywords = dict.fromkeys(keywords, 1.0)
+        query_phrases = {}
+        for keyword, weight in keywords.items():
+            phrase = tuple(tokenize(keyword))
+            if phrase:
+                query_phrases[phrase] = max(weight, query_phrases.get(phrase, 0))
+        ranked = [dict(news, relevance=round(self.score(query_phrases, news["title"]), 3)) for news in news_list]
+        ranked.sort(key=lambda news: news["relevance"], reverse=True)
+        if not ranked or not ranked[0]["relevance"]:
+            return ranked, []
+        cutoff = ranked[0]["relevance"] * min_ratio
+        selected = [news for news in ranked if news["relevance"] > 0 and news["relevance"] >= cutoff][:top_k]
+        return ranked, selected
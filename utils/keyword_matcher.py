@@ -0,0 +1,106 @@
+"""Compiled multi-keyword matching for news headlines."""
+
+import re
+from functools import lru_cache
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _normalize_token(token):
+    """Fold simple plurals so "tariffs" matches "tariff" and "currencies" matches "currency"."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Split text into normalized lowercase word tokens."""
+    return [_normalize_token(token) for token in _TOKEN_PATTERN.findall(text.lower())]
+
+
+class KeywordMatcher:
+    """Match headlines against a set of keywords in a single pass over each title.
+
+    Keywords are compiled into a token index keyed on their first word, so a
+    title is scanned once regardless of how many keywords there are. Keywords
+    match on whole words ("us" does not match "business") with simple plurals
+    folded, and multi-word keywords must appear as a contiguous phrase.
+    """
+
+    def __init__(self, keywords):
+        """Compile the keyword set."""
+        self.keywords = []
+        self._index = {}
+
+        for keyword in dict.fromkeys(keywords):
+            tokens = tuple(tokenize(keyword))
+            if not tokens:
+                continue
+            self.keywords.append(keyword)
+            self._index.setdefault(tokens[0], []).append((tokens, keyword))
+
+    def matched_keywords(self, title):
+        """Return the set of keywords that occur in the title."""
+        tokens = tokenize(title)
+        matched = set()
+
+        for i, token in enumerate(tokens):
+            for keyword_tokens, keyword in self._index.get(token, ()):
+                if tuple(tokens[i:i + len(keyword_tokens)]) == keyword_tokens:
+                    matched.add(keyword)
+
+        return matched
+
+    def matches(self, title):
+        """Return True if any keyword occurs in the title."""
+        tokens = tokenize(title)
+
+        for i, token in enumerate(tokens):
+            for keyword_tokens, _ in self._index.get(token, ()):
+                if tuple(tokens[i:i + len(keyword_tokens)]) == keyword_tokens:
+                    return True
+
+        return False
+
+    def filter(self, news_list):
+        """Return the news items whose title matches any keyword."""
+        return [news for news in news_list if self.matches(news["title"])]
+
+
+@lru_cache(maxsize=256)
+def _compile_matcher(keywords):
+    return KeywordMatcher(keywords)
+
+
+def get_keyword_matcher(keywords):
+    """Return a compiled matcher for the keywords, reusing one built for the same set."""
+    return _compile_matcher(tuple(keywords))
+
+
+def match_keyword_sets(news_list, keyword_sets):
+    """Filter one headline list against many keyword sets in a single pass.
+
+    Returns one list of matching news items per keyword set, in input order.
+    Each headline is tokenized once against the union of all keywords, and
+    matches are fanned out to the keyword sets that contain them.
+    """
+    keyword_sets = [list(keywords) for keywords in keyword_sets]
+    union = get_keyword_matcher(sorted({keyword for keywords in keyword_sets for keyword in keywords}))
+
+    # Which keyword sets each keyword belongs to
+    owners = {}
+    for set_index, keywords in enumerate(keyword_sets):
+        for keyword in keywords:
+            owners.setdefault(keyword, set()).add(set_index)
+
+    results = [[] for _ in keyword_sets]
+    for news in news_list:
+        matched_sets = set()
+        for keyword in union.matched_keywords(news["title"]):
+            matched_sets |= owners[keyword]
+        for set_index in sorted(matched_sets):
+            results[set_index].append(news)
+
+    return results
@@ -0,0 +1,198 @@
+"""Persistent cache for LLM responses."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from config import LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
+from utils.tracing import get_tracer, span
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return " ".join(prompt.split())
+
+
+def cache_key(model_name, prompt):
+    """Build the content-addressed key for a model and prompt."""
+    content = f"{model_name}\0{normalize_prompt(prompt)}"
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Disk-backed LLM response cache with TTL and LRU eviction."""
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        """Open (or create) the cache database."""
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def get(self, model_name, prompt):
+        """Return the cached response text, or None on a miss."""
+        key = cache_key(model_name, prompt)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, model_name, prompt, response_text):
+        """Store a response and evict least recently used entries over the size cap."""
+        key = cache_key(model_name, prompt)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, model_name, response_text, now, now)
+            )
+            self._conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove all cached responses and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+class CachedResponse:
+    """Minimal stand-in for a generate_content response served from the cache."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class CachedGenerativeModel:
+    """Wrap a generative model so repeated prompts are answered from the cache."""
+
+    def __init__(self, model, cache=None, model_name=None):
+        """Wrap any object exposing generate_content(prompt) -> response with .text."""
+        self.model = model
+        self.cache = cache or get_default_cache()
+        self.model_name = model_name or getattr(model, "model_name", type(model).__name__)
+
+    def _record_call(self, llm_span, prompt, response_text, cached):
+        """Attach prompt/response sizes to the span and count the call."""
+        llm_span.set_attributes(prompt_chars=len(prompt), response_chars=len(response_text), cached=cached)
+        metrics = get_tracer().metrics
+        metrics.inc("risk_llm_calls_total", model=self.model_name, cached=str(cached).lower())
+        metrics.inc("risk_llm_prompt_chars_total", len(prompt), model=self.model_name)
+        metrics.inc("risk_llm_response_chars_total", len(response_text), model=self.model_name)
+
+    def generate_content(self, prompt, validate=None, **kwargs):
+        """Return a cached response if available, otherwise call the model and cache it.
+
+        validate(text) -> bool, if given, decides whether a response is usable:
+        unusable responses are returned but not cached, so the next call asks
+        the model again.
+        """
+        # Streaming and per-call generation options bypass the cache
+        if kwargs:
+            return self.model.generate_content(prompt, **kwargs)
+
+        with span("llm.generate", model=self.model_name) as llm_span:
+            cached_text = self.cache.get(self.model_name, prompt)
+            if cached_text is not None and (validate is None or validate(cached_text)):
+                self._record_call(llm_span, prompt, cached_text, cached=True)
+                return CachedResponse(cached_text)
+
+            response = self.model.generate_content(prompt)
+            if validate is None or validate(response.text):
+                self.cache.set(self.model_name, prompt, response.text)
+            else:
+                llm_span.set_attribute("rejected", True)
+            self._record_call(llm_span, prompt, response.text, cached=False)
+            return response
+
+    def stream_content(self, prompt):
+        """Yield response text chunks as they arrive, caching the full text once complete.
+
+        A cached response is yielded as a single chunk.
+        """
+        tracer = get_tracer()
+        llm_span = tracer.start_span("llm.stream", model=self.model_name)
+        error = None
+        try:
+            cached_text = self.cache.get(self.model_name, prompt)
+            if cached_text is not None:
+                self._record_call(llm_span, prompt, cached_text, cached=True)
+                yield cached_text
+                return
+
+            chunks = []
+            for chunk in self.model.generate_content(prompt, stream=True):
+                text = chunk.text
+                if not chunks:
+                    llm_span.set_attribute("first_chunk_seconds", round(llm_span.elapsed(), 4))
+                chunks.append(text)
+                yield text
+
+            response_text = "".join(chunks)
+            self.cache.set(self.model_name, prompt, response_text)
+            self._record_call(llm_span, prompt, response_text, cached=False)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            tracer.end_span(llm_span, error)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Return the process-wide LLM response cache."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
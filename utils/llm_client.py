@@ -0,0 +1,255 @@
+"""Process-wide registry of Gemini clients with rate limiting, concurrency caps and retries."""
+
+import random
+import threading
+import time
+
+import google.generativeai as genai
+from langchain_core.callbacks import BaseCallbackHandler
+from config import (
+    GEMINI_API_KEY, LLM_MODEL_NAME, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_MAX_IN_FLIGHT,
+    LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, LLM_OUTPUT_TOKEN_ESTIMATE
+)
+from utils.tracing import get_tracer
+
+# HTTP statuses worth retrying: rate limited or a transient server error
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_configured_key = None
+_configure_lock = threading.Lock()
+
+
+def configure_genai(api_key=GEMINI_API_KEY):
+    """Configure the google.generativeai SDK once per API key."""
+    global _configured_key
+    with _configure_lock:
+        if _configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+
+
+def estimate_tokens(text):
+    """Rough token count for quota accounting (about four characters per token)."""
+    return max(len(text) // 4, 1)
+
+
+def is_retryable(error):
+    """Return True for 429 and 5xx errors from the API."""
+    status = getattr(error, "code", None)
+    if status is None:
+        status = getattr(error, "status_code", None)
+    try:
+        return int(status) in RETRYABLE_STATUSES
+    except (TypeError, ValueError):
+        return False
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding at most one minute's worth.
+
+    Callers take what they need immediately and, if that leaves the bucket in
+    debt, sleep until it is repaid, so concurrent callers queue fairly.
+    """
+
+    def __init__(self, rate_per_minute):
+        """Initialize a full bucket; a rate of 0 disables limiting."""
+        self.rate_per_minute = rate_per_minute
+        self.capacity = rate_per_minute
+        self._tokens = rate_per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_minute / 60)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """Take amount tokens, blocking while the bucket is in debt; returns seconds waited."""
+        if not self.rate_per_minute:
+            return 0.0
+        with self._lock:
+            self._refill()
+            self._tokens -= min(amount, self.capacity)
+            wait = -self._tokens * 60 / self.rate_per_minute if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def adjust(self, amount):
+        """Take (or with a negative amount, return) tokens without waiting, e.g. to correct an estimate."""
+        if not self.rate_per_minute:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets plus a cap on in-flight calls."""
+
+    def __init__(self, requests_per_minute=LLM_REQUESTS_PER_MINUTE, tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 max_in_flight=LLM_MAX_IN_FLIGHT):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def acquire(self, estimated_tokens):
+        """Wait for quota and an in-flight slot; release the slot with release()."""
+        waited = self.requests.acquire(1) + self.tokens.acquire(estimated_tokens)
+        if waited:
+            get_tracer().metrics.inc("risk_llm_throttled_seconds_total", waited)
+        self.in_flight.acquire()
+
+    def release(self):
+        self.in_flight.release()
+
+
+class RateLimitedModel:
+    """A generative model whose calls go through a shared RateLimiter, with jittered retries."""
+
+    def __init__(self, model, limiter, max_retries=LLM_MAX_RETRIES,
+                 base_delay=LLM_RETRY_BASE_DELAY, max_delay=LLM_RETRY_MAX_DELAY):
+        self.model = model
+        self.limiter = limiter
+        self.model_name = getattr(model, "model_name", type(model).__name__)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff delay for the given attempt (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _settle_tokens(self, response, estimated_tokens):
+        """Correct the token bucket with the usage the API reported, if any."""
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None)
+        if isinstance(total, int) and total:
+            self.limiter.tokens.adjust(total - estimated_tokens)
+
+    def generate_content(self, prompt, **kwargs):
+        """Call the model within the rate limits, retrying 429/5xx errors.
+
+        With stream=True the in-flight slot is held until the stream is
+        consumed; only the initial request is retried.
+        """
+        estimated_tokens = estimate_tokens(prompt) + LLM_OUTPUT_TOKEN_ESTIMATE
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(estimated_tokens)
+            try:
+                response = self.model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                self.limiter.release()
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt)
+                get_tracer().metrics.inc("risk_llm_retries_total", model=self.model_name)
+                print(f"LLM call failed (attempt {attempt + 1}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                continue
+
+            if kwargs.get("stream"):
+                return self._stream(response)
+            self.limiter.release()
+            self._settle_tokens(response, estimated_tokens)
+            return response
+
+    def _stream(self, response):
+        """Yield streamed chunks, releasing the in-flight slot when done."""
+        try:
+            yield from response
+        finally:
+            self.limiter.release()
+
+
+class RateLimitCallback(BaseCallbackHandler):
+    """Put LangChain chat model calls through a shared RateLimiter.
+
+    The quota and in-flight slot are taken when a call starts and the slot is
+    released when it ends or fails, so the CrewAI agents share the budget of
+    the direct generate_content calls. Retries happen inside the chat model
+    and count as one call here.
+    """
+
+    run_inline = True
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        text = "".join(str(message.content) for batch in messages for message in batch)
+        estimated_tokens = estimate_tokens(text) + LLM_OUTPUT_TOKEN_ESTIMATE
+        self.limiter.acquire(estimated_tokens)
+        with self._lock:
+            self._estimates[run_id] = estimated_tokens
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            estimated_tokens = self._estimates.pop(run_id, None)
+        if estimated_tokens is None:
+            return
+        self.limiter.release()
+
+        # Correct the token bucket with the usage the API reported, if any
+        total = 0
+        for generation in (g for batch in response.generations for g in batch):
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            total += usage.get("total_tokens", 0)
+        if total:
+            self.limiter.tokens.adjust(total - estimated_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            estimated_tokens = self._estimates.pop(run_id, None)
+        if estimated_tokens is not None:
+            self.limiter.release()
+
+
+class LLMClientRegistry:
+    """Hands out shared, rate-limited model clients so each is built only once per process."""
+
+    def __init__(self, limiter=None):
+        self.limiter = limiter or RateLimiter()
+        self._models = {}
+        self._chat_models = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, model_name=LLM_MODEL_NAME):
+        """Return the shared rate-limited genai.GenerativeModel for model_name."""
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                configure_genai()
+                model = self._models[model_name] = RateLimitedModel(genai.GenerativeModel(model_name), self.limiter)
+            return model
+
+    def get_chat_model(self, model_name=LLM_MODEL_NAME):
+        """Return the shared LangChain chat model used by the CrewAI agents, rate limited like get_model()."""
+        with self._lock:
+            chat_model = self._chat_models.get(model_name)
+            if chat_model is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                chat_model = self._chat_models[model_name] = ChatGoogleGenerativeAI(
+                    model=model_name,
+                    google_api_key=GEMINI_API_KEY,
+                    max_retries=LLM_MAX_RETRIES,
+                    callbacks=[RateLimitCallback(self.limiter)]
+                )
+            return chat_model
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_registry():
+    """Return the process-wide LLM client registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMClientRegistry()
+        return _registry
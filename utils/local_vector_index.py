@@ -0,0 +1,253 @@
+"""Local, dependency-light vector index backed by a memory-mapped float32 matrix."""
+
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+from config import LOCAL_EMBEDDING_DIM, LOCAL_INDEX_APPROX_MIN_ROWS, LOCAL_INDEX_LSH_BITS
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Embed text on the CPU by feature-hashing words and word bigrams.
+
+    Needs no model download or network access. Vectors are L2-normalized, so
+    dot products are cosine similarities.
+    """
+
+    def __init__(self, dim=LOCAL_EMBEDDING_DIM):
+        """Initialize with the output dimension."""
+        self.dim = dim
+
+    def embed(self, texts):
+        """Return a (len(texts), dim) float32 matrix of embeddings."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_PATTERN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                # The top bit picks the sign so collisions tend to cancel out
+                matrix[row, hashed % self.dim] += 1.0 if hashed & 0x80000000 else -1.0
+
+            # Dampen repeated terms, then normalize
+            vector = matrix[row]
+            np.copysign(np.log1p(np.abs(vector)), vector, out=vector)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector /= norm
+
+        return matrix
+
+
+class LocalCollection:
+    """Append-only vector collection with the subset of the Chroma Collection API we use.
+
+    Vectors live in an append-only float32 file that is memory-mapped for
+    search; ids, documents and metadata live in a JSON-lines file with one
+    record per vector row. Updates and deletes append new rows, and the latest
+    row for an id wins. Search is exact (one matrix-vector product) or, for
+    large collections, approximate via random-hyperplane LSH followed by an
+    exact re-rank of the candidates.
+    """
+
+    def __init__(self, path, embedder=None, approx_min_rows=LOCAL_INDEX_APPROX_MIN_ROWS, lsh_bits=LOCAL_INDEX_LSH_BITS):
+        """Open (or create) the collection stored in the directory at path."""
+        self.path = path
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self.approx_min_rows = approx_min_rows
+        self._lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._records_path = os.path.join(path, "records.jsonl")
+
+        # Fixed random hyperplanes so signatures are stable across restarts
+        self._hyperplanes = np.random.default_rng(0).standard_normal((lsh_bits, self.dim)).astype(np.float32)
+
+        self._load()
+
+    def _load(self):
+        """Rebuild the in-memory row maps from disk."""
+        self._records = []
+        if os.path.exists(self._records_path):
+            with open(self._records_path, "r", encoding="utf-8") as f:
+                self._records = [json.loads(line) for line in f if line.strip()]
+
+        # Drop a half-written tail so records and vector rows stay aligned
+        vector_rows = os.path.getsize(self._vectors_path) // (4 * self.dim) if os.path.exists(self._vectors_path) else 0
+        row_count = min(len(self._records), vector_rows)
+        if row_count < len(self._records) or row_count < vector_rows:
+            self._records = self._records[:row_count]
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(row_count * 4 * self.dim)
+            with open(self._records_path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in self._records)
+
+        self._latest = {}
+        self._live = np.zeros(row_count, dtype=bool)
+        self._project_rows = {}
+        for row, record in enumerate(self._records):
+            self._index_record(row, record)
+
+        self._remap()
+        self._signatures = self._signature(np.asarray(self._matrix)) if row_count else np.zeros((0, 0), dtype=np.uint8)
+
+    def _index_record(self, row, record):
+        """Point the record's id at this row and update the live mask."""
+        previous = self._latest.get(record["id"])
+        if previous is not None:
+            self._live[previous] = False
+        if record.get("deleted"):
+            self._latest.pop(record["id"], None)
+            return
+        self._latest[record["id"]] = row
+        self._live[row] = True
+        project_id = (record.get("metadata") or {}).get("project_id")
+        if project_id is not None:
+            self._project_rows.setdefault(project_id, []).append(row)
+
+    def _remap(self):
+        """Memory-map the vector file at its current length."""
+        rows = len(self._records)
+        self._matrix = (
+            np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            if rows else np.zeros((0, self.dim), dtype=np.float32)
+        )
+
+    def _signature(self, vectors):
+        """Pack the sign pattern of vectors against the hyperplanes into bytes."""
+        return np.packbits(vectors @ self._hyperplanes.T > 0, axis=1)
+
+    def _append(self, records, vectors):
+        """Append records and their vectors to disk and to the in-memory maps."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(records), self.dim)
+        with open(self._vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self._records_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+
+        start = len(self._records)
+        self._records.extend(records)
+        self._live = np.concatenate([self._live, np.zeros(len(records), dtype=bool)])
+        for offset, record in enumerate(records):
+            self._index_record(start + offset, record)
+
+        signatures = self._signature(vectors)
+        self._signatures = np.concatenate([self._signatures, signatures]) if start else signatures
+        self._remap()
+
+    def upsert(self, ids, documents, metadatas=None, embeddings=None):
+        """Add or replace documents."""
+        metadatas = metadatas or [None] * len(ids)
+        if embeddings is None:
+            embeddings = self.embedder.embed(documents)
+        records = [
+            {"id": doc_id, "document": document, "metadata": metadata}
+            for doc_id, document, metadata in zip(ids, documents, metadatas)
+        ]
+        with self._lock:
+            self._append(records, embeddings)
+
+    def add(self, ids, documents, metadatas=None, embeddings=None):
+        """Add documents; ids that already exist are replaced."""
+        self.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, ids=None):
+        """Delete documents by id."""
+        ids = [doc_id for doc_id in ids or [] if doc_id in self._latest]
+        if not ids:
+            return
+        records = [{"id": doc_id, "deleted": True} for doc_id in ids]
+        with self._lock:
+            self._append(records, np.zeros((len(ids), self.dim), dtype=np.float32))
+
+    def count(self):
+        """Return the number of live documents."""
+        return len(self._latest)
+
+    def _filter_mask(self, where):
+        """Return a boolean row mask for live rows matching an equality filter."""
+        mask = self._live.copy()
+        for key, value in (where or {}).items():
+            if isinstance(value, dict):
+                raise ValueError("LocalCollection only supports equality filters")
+            if key == "project_id":
+                key_mask = np.zeros(len(mask), dtype=bool)
+                key_mask[self._project_rows.get(value, [])] = True
+            else:
+                key_mask = np.array([
+                    (record.get("metadata") or {}).get(key) == value for record in self._records
+                ], dtype=bool)
+            mask &= key_mask
+        return mask
+
+    def get(self, ids=None, where=None, include=None):
+        """Return documents by id and/or metadata filter, Chroma-style."""
+        if ids is not None:
+            rows = [self._latest[doc_id] for doc_id in ids if doc_id in self._latest]
+            if where:
+                mask = self._filter_mask(where)
+                rows = [row for row in rows if mask[row]]
+        else:
+            rows = np.flatnonzero(self._filter_mask(where)).tolist()
+
+        return {
+            "ids": [self._records[row]["id"] for row in rows],
+            "documents": [self._records[row]["document"] for row in rows],
+            "metadatas": [self._records[row]["metadata"] for row in rows]
+        }
+
+    def query(self, query_texts, n_results=10, where=None, approximate=None, candidates=None):
+        """Return the nearest documents to each query text, Chroma-style.
+
+        Distances are squared L2 distances between unit vectors. approximate
+        defaults to True once the collection has approx_min_rows rows.
+        """
+        mask = self._filter_mask(where)
+        live_rows = int(mask.sum())
+        if approximate is None:
+            approximate = live_rows >= self.approx_min_rows
+
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        query_vectors = self.embedder.embed(query_texts)
+
+        for query_vector in query_vectors:
+            k = min(n_results, live_rows)
+            if k == 0:
+                rows, scores = np.array([], dtype=int), np.array([], dtype=np.float32)
+            else:
+                if approximate:
+                    # Rank by Hamming distance between signatures, then re-rank exactly
+                    signature = self._signature(query_vector[None, :])[0]
+                    hamming = np.unpackbits(self._signatures ^ signature, axis=1).sum(axis=1)
+                    hamming[~mask] = np.iinfo(hamming.dtype).max
+                    candidate_count = min(candidates or max(k * 20, 200), live_rows)
+                    candidate_rows = np.argpartition(hamming, candidate_count - 1)[:candidate_count]
+                    candidate_scores = self._matrix[candidate_rows] @ query_vector
+                elif live_rows * 4 < len(mask):
+                    # Narrow filters: gather only the matching rows
+                    candidate_rows = np.flatnonzero(mask)
+                    candidate_scores = self._matrix[candidate_rows] @ query_vector
+                else:
+                    # Score the whole mapped matrix in place and mask out the rest
+                    candidate_rows = np.arange(len(mask))
+                    candidate_scores = np.asarray(self._matrix @ query_vector)
+                    candidate_scores[~mask] = -np.inf
+
+                top = np.argpartition(-candidate_scores, k - 1)[:k]
+                top = top[np.argsort(-candidate_scores[top])]
+                rows, scores = candidate_rows[top], candidate_scores[top]
+
+            results["ids"].append([self._records[row]["id"] for row in rows])
+            results["documents"].append([self._records[row]["document"] for row in rows])
+            results["metadatas"].append([self._records[row]["metadata"] for row in rows])
+            results["distances"].append([float(2 - 2 * score) for score in scores])
+
+        return results
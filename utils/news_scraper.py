@@ -1,110 +1,241 @@
 """Utilities for scraping news articles from the web."""
 
-import requests
-from bs4 import BeautifulSoup
+import multiprocessing
+import threading
 import time
-import pandas as pd
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from config import NEWS_FETCH_WORKERS, NEWS_PARSE_WORKERS, NEWS_REQUEST_TIMEOUT, NEWS_DOMAIN_MIN_INTERVAL
+from utils.keyword_matcher import get_keyword_matcher
+from utils.tracing import get_tracer, span
+
+# Sources for economic news
+ECONOMIC_SOURCES = [
+    {"url": "https://www.reuters.com/business/", "domain": "reuters.com"},
+    {"url": "https://www.ft.com/global-economy", "domain": "ft.com"},
+    {"url": "https://www.bloomberg.com/markets", "domain": "bloomberg.com"}
+]
+
+# Sources for geopolitical news
+GEOPOLITICAL_SOURCES = [
+    {"url": "https://www.aljazeera.com/middle-east/", "domain": "aljazeera.com"},
+    {"url": "https://www.bbc.com/news/world", "domain": "bbc.com"},
+    {"url": "https://www.cnn.com/world", "domain": "cnn.com"}
+]
+
+# Headline extraction: which elements hold headlines and which parser to use.
+# Only the matching elements are built into the parse tree. "attrs" narrows the
+# match to a source's headline container, and "title" names the element inside
+# it that holds the headline text. Sources not listed use the default profile.
+DEFAULT_PARSE_PROFILE = {"tags": ["h2", "h3", "h4"], "attrs": {}, "title": None, "parser": "lxml", "min_length": 10}
+
+PARSE_PROFILES = {
+    "reuters.com": {
+        "tags": ["a"], "attrs": {"data-testid": "TitleLink"}, "title": ("span", {"data-testid": "TitleHeading"})
+    },
+    "ft.com": {"tags": ["a"], "attrs": {"class": "js-teaser-heading-link"}},
+    "aljazeera.com": {"tags": ["h3"], "attrs": {"class": "gc__title"}},
+    "bbc.com": {"tags": ["a"], "attrs": {"data-testid": "internal-link"}, "title": ("h2", {"data-testid": "card-headline"})},
+    "cnn.com": {"tags": ["a"], "attrs": {"class": "container__link"}, "title": ("span", {"class": "container__headline-text"})}
+}
+
+
+def get_parse_profile(domain):
+    """Return the extraction profile for a domain, filled in from the default."""
+    return {**DEFAULT_PARSE_PROFILE, **PARSE_PROFILES.get(domain, {})}
+
+
+def _extract_headlines(html, source, profile):
+    """Extract headline items from a page with one parse profile."""
+    soup = BeautifulSoup(html, profile["parser"], parse_only=SoupStrainer(profile["tags"], attrs=profile["attrs"]))
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    news = []
+    for headline in soup.find_all(profile["tags"], attrs=profile["attrs"]):
+        # Image and section links share the container but have no headline text
+        title_element = headline.find(*profile["title"]) if profile["title"] else headline
+        if title_element is None:
+            continue
+        title = title_element.get_text().strip()
+        if len(title) <= profile["min_length"]:
+            continue
+
+        link = None
+        anchor = headline if headline.name == "a" else headline.find('a')
+        if anchor:
+            link = anchor.get('href')
+            if link and not link.startswith('http'):
+                link = f"https://{source['domain']}{link}"
+
+        news.append({
+            "title": title,
+            "source": source["domain"],
+            "link": link,
+            "date": today
+        })
+
+    return news
+
+
+def parse_headlines(html, source):
+    """Extract headline items from a page using the source's parse profile.
+
+    If a source's profile finds nothing (e.g. the site changed its markup),
+    the page is parsed again with the default profile.
+    Defined at module level so it can run in a process pool.
+    """
+    news = _extract_headlines(html, source, get_parse_profile(source["domain"]))
+    if not news and source["domain"] in PARSE_PROFILES:
+        news = _extract_headlines(html, source, DEFAULT_PARSE_PROFILE)
+    return news
+
+
+class DomainRateLimiter:
+    """Enforce a minimum interval between requests to the same domain."""
+
+    def __init__(self, min_interval=NEWS_DOMAIN_MIN_INTERVAL):
+        """Initialize the limiter with the minimum per-domain interval in seconds."""
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, domain):
+        """Block until a request to the domain is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.min_interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
 
 class NewsScraper:
-    def __init__(self):
-        """Initialize the news scraper."""
+    def __init__(self, max_workers=NEWS_FETCH_WORKERS, parse_workers=NEWS_PARSE_WORKERS,
+                 economic_sources=None, geopolitical_sources=None, min_domain_interval=NEWS_DOMAIN_MIN_INTERVAL):
+        """Initialize the news scraper.
+
+        The source lists default to ECONOMIC_SOURCES and GEOPOLITICAL_SOURCES;
+        pass others to scrape different (e.g. locally served) pages.
+        """
+        self.economic_sources = economic_sources if economic_sources is not None else ECONOMIC_SOURCES
+        self.geopolitical_sources = geopolitical_sources if geopolitical_sources is not None else GEOPOLITICAL_SOURCES
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        
+
+        # Keep-alive session shared by all fetch workers
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.rate_limiter = DomainRateLimiter(min_domain_interval)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-fetch")
+
+        # Headline parsing is CPU-bound, so it runs in worker processes
+        self.parse_executor = None
+        if parse_workers > 0:
+            self.parse_executor = ProcessPoolExecutor(
+                max_workers=parse_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        # Validators and parsed headlines from the last successful fetch of each URL
+        self._source_cache = {}
+        self._cache_lock = threading.Lock()
+
+    def _scrape_source(self, source):
+        """Fetch a single source and extract its headlines.
+
+        Uses ETag/Last-Modified validators from the previous fetch so that an
+        unchanged page is answered with 304 and served from the last parse.
+        """
+        url = source["url"]
+        with self._cache_lock:
+            cached = self._source_cache.get(url)
+
+        request_headers = {}
+        if cached:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+
+        # Respect rate limits for this domain only
+        self.rate_limiter.wait(source["domain"])
+
+        try:
+            with span("http.get", url=url, domain=source["domain"], conditional=bool(request_headers)) as request_span:
+                response = self.session.get(url, headers=request_headers, timeout=NEWS_REQUEST_TIMEOUT)
+                request_span.set_attributes(status=response.status_code, bytes=len(response.content))
+            metrics = get_tracer().metrics
+            metrics.inc("risk_http_requests_total", domain=source["domain"], status=response.status_code)
+            metrics.inc("risk_http_response_bytes_total", len(response.content), domain=source["domain"])
+
+            if response.status_code == 304 and cached:
+                return cached["news"]
+
+            if response.status_code == 200:
+                news = self._parse_headlines(response.text, source)
+                with self._cache_lock:
+                    self._source_cache[url] = {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "news": news
+                    }
+                return news
+
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+
+        # Fall back to the last good result for this source, if any
+        return cached["news"] if cached else []
+
+    def _parse_headlines(self, html, source):
+        """Extract headline items from a page, off the GIL when a parse pool is configured."""
+        if self.parse_executor is None:
+            return parse_headlines(html, source)
+        return self.parse_executor.submit(parse_headlines, html, source).result()
+
+    def _scrape_sources(self, sources):
+        """Scrape several sources concurrently, preserving source order."""
+        news = []
+        for source_news in self.executor.map(self._scrape_source, sources):
+            news.extend(source_news)
+        return news
+
     def get_economic_news(self):
         """Scrape economic news related to tariffs, exchange rates, etc."""
-        economic_news = []
-        
-        # Sources for economic news
-        sources = [
-            {"url": "https://www.reuters.com/business/", "domain": "reuters.com"},
-            {"url": "https://www.ft.com/global-economy", "domain": "ft.com"},
-            {"url": "https://www.bloomberg.com/markets", "domain": "bloomberg.com"}
-        ]
-        
-        for source in sources:
-            try:
-                response = requests.get(source["url"], headers=self.headers, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract headlines and links (implementation varies by website)
-                    headlines = soup.find_all(['h2', 'h3', 'h4'])
-                    
-                    for headline in headlines:
-                        if headline.text and len(headline.text.strip()) > 10:
-                            link = None
-                            if headline.find('a'):
-                                link = headline.find('a').get('href')
-                                if link and not link.startswith('http'):
-                                    link = f"https://{source['domain']}{link}"
-                            
-                            economic_news.append({
-                                "title": headline.text.strip(),
-                                "source": source["domain"],
-                                "link": link,
-                                "date": datetime.now().strftime("%Y-%m-%d")
-                            })
-                            
-            except Exception as e:
-                print(f"Error scraping {source['url']}: {e}")
-                
-            # Respect rate limits
-            time.sleep(2)
-            
-        return economic_news
-        
+        return self._scrape_sources(self.economic_sources)
+
     def get_geopolitical_news(self):
         """Scrape geopolitical news related to conflicts, trade restrictions, etc."""
-        geopolitical_news = []
-        
-        # Sources for geopolitical news
-        sources = [
-            {"url": "https://www.aljazeera.com/middle-east/", "domain": "aljazeera.com"},
-            {"url": "https://www.bbc.com/news/world", "domain": "bbc.com"},
-            {"url": "https://www.cnn.com/world", "domain": "cnn.com"}
-        ]
-        
-        for source in sources:
-            try:
-                response = requests.get(source["url"], headers=self.headers, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract headlines and links
-                    headlines = soup.find_all(['h2', 'h3', 'h4'])
-                    
-                    for headline in headlines:
-                        if headline.text and len(headline.text.strip()) > 10:
-                            link = None
-                            if headline.find('a'):
-                                link = headline.find('a').get('href')
-                                if link and not link.startswith('http'):
-                                    link = f"https://{source['domain']}{link}"
-                            
-                            geopolitical_news.append({
-                                "title": headline.text.strip(),
-                                "source": source["domain"],
-                                "link": link,
-                                "date": datetime.now().strftime("%Y-%m-%d")
-                            })
-                            
-            except Exception as e:
-                print(f"Error scraping {source['url']}: {e}")
-                
-            # Respect rate limits
-            time.sleep(2)
-            
-        return geopolitical_news
-        
+        return self._scrape_sources(self.geopolitical_sources)
+
+    def get_all_news(self):
+        """Scrape economic and geopolitical news in a single concurrent pass."""
+        economic_futures = [self.executor.submit(self._scrape_source, source) for source in self.economic_sources]
+        geopolitical_futures = [self.executor.submit(self._scrape_source, source) for source in self.geopolitical_sources]
+
+        economic_news = [item for future in economic_futures for item in future.result()]
+        geopolitical_news = [item for future in geopolitical_futures for item in future.result()]
+
+        return economic_news, geopolitical_news
+
+    def close(self):
+        """Stop the fetch and parse workers and close the HTTP session."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
     def filter_relevant_news(self, news_list, keywords):
         """Filter news articles based on relevant keywords."""
-        relevant_news = []
-        
-        for news in news_list:
-            if any(keyword.lower() in news["title"].lower() for keyword in keywords):
-                relevant_news.append(news)
-                
-        return relevant_news
\ No newline at end of file
+        return get_keyword_matcher(keywords).filter(news_list)
@@ -0,0 +1,152 @@
+"""Shared in-memory snapshot of scraped news."""
+
+import threading
+import time
+from concurrent.futures import Future
+from config import NEWS_SNAPSHOT_MAX_AGE, NEWS_REFRESH_INTERVAL
+from utils.news_scraper import NewsScraper
+
+
+class NewsSnapshotStore:
+    """Serve scraped headlines from memory and refresh them in the background.
+
+    Concurrent refresh requests are collapsed into a single scrape
+    (single-flight), and the scraper itself revalidates pages with
+    ETag/If-Modified-Since so unchanged sources are not re-parsed.
+    """
+
+    def __init__(self, scraper=None, max_age=NEWS_SNAPSHOT_MAX_AGE, refresh_interval=NEWS_REFRESH_INTERVAL):
+        """Initialize the store; no scraping happens until first use."""
+        self.scraper = scraper or NewsScraper()
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+
+        self._snapshot = None
+        self._inflight = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def start(self):
+        """Start the background refresh thread if it is not already running."""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._refresh_loop, name="news-refresh", daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop.set()
+
+    def close(self):
+        """Stop refreshing and release the scraper's workers and connections."""
+        self.stop()
+        self.scraper.close()
+
+    def _refresh_loop(self):
+        """Warm the snapshot, then refresh it every refresh_interval seconds."""
+        wait = 0 if self._snapshot is None else self.refresh_interval
+        while not self._stop.wait(wait):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing news snapshot: {e}")
+            wait = self.refresh_interval
+
+    def refresh(self):
+        """Scrape all sources, sharing the result with any concurrent callers."""
+        with self._lock:
+            inflight = self._inflight
+            is_leader = inflight is None
+            if is_leader:
+                inflight = self._inflight = Future()
+
+        if not is_leader:
+            return inflight.result()
+
+        try:
+            economic_news, geopolitical_news = self.scraper.get_all_news()
+            snapshot = {
+                "economic": economic_news,
+                "geopolitical": geopolitical_news,
+                "fetched_at": time.time()
+            }
+            with self._lock:
+                self._snapshot = snapshot
+            inflight.set_result(snapshot)
+            return snapshot
+        except Exception as e:
+            inflight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight = None
+
+    def _refresh_in_background(self):
+        """Kick off a refresh without waiting for it, unless one is already running."""
+        with self._lock:
+            if self._inflight is not None:
+                return
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing news snapshot: {e}")
+
+        threading.Thread(target=run, name="news-refresh-once", daemon=True).start()
+
+    @property
+    def fetched_at(self):
+        """Time the current snapshot was scraped, or None before the first scrape."""
+        snapshot = self._snapshot
+        return snapshot["fetched_at"] if snapshot is not None else None
+
+    def is_stale(self):
+        """Return True if there is no snapshot or it is older than max_age."""
+        snapshot = self._snapshot
+        return snapshot is None or time.time() - snapshot["fetched_at"] > self.max_age
+
+    def get_news(self):
+        """Return (economic_news, geopolitical_news) from the current snapshot.
+
+        Only the very first read waits for a scrape; afterwards a stale
+        snapshot is still served while a refresh runs in the background.
+        """
+        self.start()
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        elif self.is_stale():
+            self._refresh_in_background()
+
+        return snapshot["economic"], snapshot["geopolitical"]
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_news_store():
+    """Return the process-wide news snapshot store."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = NewsSnapshotStore()
+        return _default_store
+
+
+def set_news_store(store):
+    """Replace the process-wide news snapshot store, e.g. with one reading local pages."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is not None and _default_store is not store:
+            # Keep the scraper running if the new store shares it
+            if _default_store.scraper is store.scraper:
+                _default_store.stop()
+            else:
+                _default_store.close()
+        _default_store = store
@@ -1,21 +1,123 @@
 """Utilities for processing PDF documents."""
 
+import multiprocessing
 import os
-import pdfplumber
 import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+from config import DOCUMENT_CHUNK_SIZE, DOCUMENT_CHUNK_OVERLAP, PDF_EXTRACT_WORKERS, PDF_PAGES_PER_TASK
 
 def extract_text_from_pdf(pdf_path):
-    """Extract text content from a PDF file."""
-    text = ""
+    """Extract text content from a PDF file; returns "" if the file cannot be read.
     
+    Use extract_pages_from_pdf where a failed read must not look like an empty document.
+    """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
+        return "".join(text for _, text in extract_pages_from_pdf(pdf_path))
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
+        return ""
+
+def _extract_page_range(pdf_path, first_page, last_page):
+    """Extract the text of pages first_page..last_page (1-based, inclusive).
+    
+    Runs in a worker process; only the requested pages are loaded.
+    """
+    texts = []
+    with pdfplumber.open(pdf_path, pages=list(range(first_page, last_page + 1))) as pdf:
+        for page in pdf.pages:
+            texts.append(page.extract_text() or "")
+            page.close()
+    return texts
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _get_pool(workers):
+    """Return a shared process pool with the requested number of workers."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+def extract_pages_from_pdf(pdf_path, workers=PDF_EXTRACT_WORKERS, pages_per_task=PDF_PAGES_PER_TASK):
+    """Yield (page_number, text) for each page of a PDF file, in page order.
     
-    return text
+    Page ranges of pages_per_task pages are extracted in parallel on a process
+    pool. At most two ranges per worker are in flight, so memory stays bounded
+    no matter how long the document is.
+    
+    Extraction errors propagate to the caller, so a partial read is never
+    mistaken for the whole document.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        
+        # Small documents are not worth the hand-off to worker processes
+        if workers <= 1 or page_count <= pages_per_task:
+            for page_number, page in enumerate(pdf.pages, start=1):
+                yield page_number, page.extract_text() or ""
+                # Release the parsed page objects before moving on
+                page.close()
+            return
+            
+    pool = _get_pool(workers)
+    ranges = [
+        (first_page, min(first_page + pages_per_task - 1, page_count))
+        for first_page in range(1, page_count + 1, pages_per_task)
+    ]
+    in_flight = deque()
+    next_range = 0
+    
+    try:
+        while next_range < len(ranges) or in_flight:
+            while next_range < len(ranges) and len(in_flight) < workers * 2:
+                first_page, last_page = ranges[next_range]
+                in_flight.append((first_page, pool.submit(_extract_page_range, pdf_path, first_page, last_page)))
+                next_range += 1
+                
+            # A failed range raises here and ends the extraction
+            first_page, future = in_flight.popleft()
+            for offset, text in enumerate(future.result()):
+                yield first_page + offset, text
+    finally:
+        # Don't leave queued ranges running after a failure or an early close
+        for _, future in in_flight:
+            future.cancel()
+
+def chunk_text(text, chunk_size=DOCUMENT_CHUNK_SIZE, overlap=DOCUMENT_CHUNK_OVERLAP):
+    """Split text into overlapping chunks, breaking on whitespace where possible."""
+    text = text.strip()
+    if not text:
+        return []
+        
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        
+        # Back up to the last whitespace so words are not split
+        if end < len(text):
+            split = text.rfind(" ", start + overlap + 1, end)
+            if split == -1:
+                split = text.rfind("\n", start + overlap + 1, end)
+            if split != -1:
+                end = split
+                
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        
+    return [chunk for chunk in chunks if chunk]
 
 def save_uploaded_pdf(uploaded_file):
     """Save an uploaded PDF file temporarily and return the path."""
@@ -0,0 +1,228 @@
+"""SQLite history of risk analysis runs with indexed trend queries."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from config import RISK_HISTORY_PATH
+
+DAY = 24 * 60 * 60
+
+
+def _pack(payload):
+    """Serialize a payload to compact zlib-compressed JSON."""
+    return zlib.compress(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class RiskHistoryStore:
+    """Persist every analysis result and answer trend and threshold-crossing queries.
+
+    Scores and levels are plain columns so queries never touch the payload;
+    risk factors and news references go in a compressed blob read only by
+    get_run. prev_level is filled in on insert from the project's previous run,
+    so "crossed into High" is an indexed range scan rather than a window query.
+    Runs are expected to arrive in time order; a backfilled run gets the
+    level before it, but later runs keep the prev_level they were stored with.
+    Runs are never changed once stored, except that insights generated
+    after the run can be added with set_insights.
+    """
+
+    def __init__(self, path=RISK_HISTORY_PATH):
+        """Open (or create) the history database."""
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS risk_runs (
+                id INTEGER PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                risk_score REAL NOT NULL,
+                risk_level TEXT NOT NULL,
+                prev_level TEXT,
+                static_score REAL,
+                news_score REAL,
+                payload BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS risk_runs_project_ts ON risk_runs (project_id, ts);
+            CREATE INDEX IF NOT EXISTS risk_runs_crossed_high ON risk_runs (ts, project_id, risk_score, prev_level)
+                WHERE risk_level = 'High' AND (prev_level IS NULL OR prev_level != 'High');
+            CREATE TABLE IF NOT EXISTS projects (
+                project_id TEXT PRIMARY KEY,
+                project_data TEXT NOT NULL,
+                registered_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _payload(results):
+        """Pick the parts of an analysis result worth keeping."""
+        overall_risk = results.get("overall_risk", {})
+        news_risk_analysis = results.get("news_risk_analysis", {})
+        return {
+            "project_data": results.get("project_data", {}),
+            "risk_factors": overall_risk.get("risk_factors", []),
+            "insights": overall_risk.get("insights"),
+            "news": [
+                {"title": news.get("title"), "source": news.get("source"), "link": news.get("link")}
+                for news in news_risk_analysis.get("news_items", [])
+            ],
+            "degraded_stages": results.get("degraded_stages", [])
+        }
+
+    def record(self, results, ts=None):
+        """Append an analyze_project_risk result and return its run id."""
+        overall_risk = results["overall_risk"]
+        project_id = str(results["project_data"].get("project_id", "unknown"))
+        ts = ts or time.time()
+        blob = _pack(self._payload(results))
+
+        with self._lock, self._conn:
+            previous = self._conn.execute(
+                "SELECT risk_level FROM risk_runs WHERE project_id = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+                (project_id, ts)
+            ).fetchone()
+            run_id = self._conn.execute(
+                "INSERT INTO risk_runs (project_id, ts, risk_score, risk_level, prev_level, static_score, news_score, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    project_id, ts, overall_risk.get("risk_score", 0), overall_risk.get("risk_level", "Low"),
+                    previous[0] if previous else None,
+                    overall_risk.get("static_risk_score"), overall_risk.get("news_risk_score"), blob
+                )
+            ).lastrowid
+        return run_id
+
+    def set_insights(self, run_id, insights):
+        """Store insights that were streamed after the run was recorded."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT payload FROM risk_runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return
+            payload = _unpack(row[0])
+            payload["insights"] = insights
+            self._conn.execute("UPDATE risk_runs SET payload = ? WHERE id = ?", (_pack(payload), run_id))
+
+    def score_trend(self, project_id, days=90, now=None):
+        """Return [(ts, risk_score, risk_level)] for a project over the last days, oldest first."""
+        since = (now or time.time()) - days * DAY
+        with self._lock:
+            return self._conn.execute(
+                "SELECT ts, risk_score, risk_level FROM risk_runs WHERE project_id = ? AND ts >= ? ORDER BY ts",
+                (str(project_id), since)
+            ).fetchall()
+
+    def crossed_high(self, days=7, now=None):
+        """Return runs in the last days where a project entered High, newest first."""
+        since = (now or time.time()) - days * DAY
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT project_id, ts, risk_score, prev_level FROM risk_runs INDEXED BY risk_runs_crossed_high "
+                "WHERE risk_level = 'High' AND (prev_level IS NULL OR prev_level != 'High') AND ts >= ? "
+                "ORDER BY ts DESC",
+                (since,)
+            ).fetchall()
+        return [
+            {"project_id": project_id, "ts": ts, "risk_score": risk_score, "prev_level": prev_level}
+            for project_id, ts, risk_score, prev_level in rows
+        ]
+
+    def latest(self, project_id):
+        """Return the most recent run of a project, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM risk_runs WHERE project_id = ? ORDER BY ts DESC LIMIT 1", (str(project_id),)
+            ).fetchone()
+        return self.get_run(row[0]) if row else None
+
+    def get_run(self, run_id):
+        """Return a stored run with its decoded payload, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT project_id, ts, risk_score, risk_level, prev_level, static_score, news_score, payload "
+                "FROM risk_runs WHERE id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        project_id, ts, risk_score, risk_level, prev_level, static_score, news_score, blob = row
+        return {
+            "run_id": run_id,
+            "project_id": project_id,
+            "ts": ts,
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "prev_level": prev_level,
+            "static_risk_score": static_score,
+            "news_risk_score": news_score,
+            **_unpack(blob)
+        }
+
+    def register_project(self, project_data):
+        """Add or update a project for scheduled re-evaluation."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO projects (project_id, project_data, registered_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (project_id) DO UPDATE SET project_data = excluded.project_data",
+                (str(project_data["project_id"]), json.dumps(project_data), time.time())
+            )
+
+    def unregister_project(self, project_id):
+        """Stop re-evaluating a project; its history is kept."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM projects WHERE project_id = ?", (str(project_id),))
+
+    def registered_projects(self):
+        """Return the project_data of every registered project."""
+        with self._lock:
+            rows = self._conn.execute("SELECT project_data FROM projects ORDER BY project_id").fetchall()
+        return [json.loads(project_data) for project_data, in rows]
+
+    def portfolio_overview(self):
+        """Return the latest score and level of every registered project; None fields if never run."""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT p.project_id, r.id, r.ts, r.risk_score, r.risk_level, r.prev_level
+                FROM projects p
+                LEFT JOIN risk_runs r ON r.id = (
+                    SELECT id FROM risk_runs WHERE project_id = p.project_id ORDER BY ts DESC LIMIT 1
+                )
+                ORDER BY p.project_id
+            """).fetchall()
+        return [
+            {
+                "project_id": project_id, "run_id": run_id, "ts": ts,
+                "risk_score": risk_score, "risk_level": risk_level, "prev_level": prev_level
+            }
+            for project_id, run_id, ts, risk_score, risk_level, prev_level in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_history_store = None
+_history_lock = threading.Lock()
+
+
+def get_history_store():
+    """Return the process-wide risk history store."""
+    global _history_store
+    with _history_lock:
+        if _history_store is None:
+            _history_store = RiskHistoryStore()
+        return _history_store
@@ -0,0 +1,119 @@
+"""Small dependency-graph executor for running pipeline stages concurrently."""
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils.tracing import span
+
+
+class Stage:
+    """A named unit of work with dependencies, an optional deadline and a fallback."""
+
+    def __init__(self, name, func, depends_on=(), timeout=None, fallback=None):
+        """Create a stage.
+
+        func and fallback are called with a dict of the results of the stages
+        this one depends on. The fallback supplies the stage result when it
+        fails or misses its deadline; without one the result is None.
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+class StageGraph:
+    """Run stages as soon as their dependencies finish, each on its own worker thread."""
+
+    def __init__(self):
+        """Initialize an empty graph."""
+        self.stages = {}
+
+    def add_stage(self, name, func, depends_on=(), timeout=None, fallback=None):
+        """Add a stage; dependencies must already have been added."""
+        for dependency in depends_on:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self.stages[name] = Stage(name, func, depends_on, timeout, fallback)
+        return self
+
+    @staticmethod
+    def _run_stage(stage, dependency_results):
+        """Run a stage inside a tracing span, as a child of the caller's current span."""
+        with span(f"stage.{stage.name}"):
+            return stage.func(dependency_results)
+
+    def run(self):
+        """Run every stage and return results, per-stage wall times and degraded stages.
+
+        A stage that raises or misses its deadline is marked degraded and its
+        fallback result is passed on to its dependents. Threads running a
+        timed-out stage are abandoned rather than waited for.
+        """
+        results = {}
+        timings = {}
+        degraded = []
+        errors = {}
+
+        pending = dict(self.stages)
+        running = {}  # future -> (stage, start time)
+        executor = ThreadPoolExecutor(max_workers=max(len(self.stages), 1), thread_name_prefix="stage")
+
+        def finish(stage, started, value=None, error=None):
+            timings[stage.name] = round(time.perf_counter() - started, 4)
+            if error is None:
+                results[stage.name] = value
+                return
+            degraded.append(stage.name)
+            errors[stage.name] = error
+            dependency_results = {name: results[name] for name in stage.depends_on}
+            try:
+                results[stage.name] = stage.fallback(dependency_results) if stage.fallback else None
+            except Exception as e:
+                results[stage.name] = None
+                errors[stage.name] = f"{error}; fallback failed: {e}"
+
+        try:
+            while pending or running:
+                # Start every stage whose dependencies are done
+                for name, stage in list(pending.items()):
+                    if all(dependency in results for dependency in stage.depends_on):
+                        dependency_results = {dependency: results[dependency] for dependency in stage.depends_on}
+                        future = executor.submit(
+                            contextvars.copy_context().run, self._run_stage, stage, dependency_results
+                        )
+                        running[future] = (stage, time.perf_counter())
+                        del pending[name]
+
+                # Wait until a stage finishes or the nearest deadline passes
+                now = time.perf_counter()
+                deadlines = [
+                    started + stage.timeout - now
+                    for stage, started in running.values() if stage.timeout is not None
+                ]
+                timeout = max(min(deadlines), 0) if deadlines else None
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage, started = running.pop(future)
+                    try:
+                        finish(stage, started, value=future.result())
+                    except Exception as e:
+                        finish(stage, started, error=f"{type(e).__name__}: {e}")
+
+                # Give up on stages that are past their deadline
+                now = time.perf_counter()
+                for future, (stage, started) in list(running.items()):
+                    if stage.timeout is not None and now - started >= stage.timeout:
+                        running.pop(future)
+                        finish(stage, started, error=f"Timed out after {stage.timeout}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return {
+            "results": results,
+            "timings": timings,
+            "degraded": degraded,
+            "errors": errors
+        }
@@ -0,0 +1,136 @@
+"""Rule-table scoring for static project risk factors."""
+
+import numpy as np
+import pandas as pd
+from config import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, STATIC_RISK_RULES
+
+STATIC_RISK_CATEGORIES = list(STATIC_RISK_RULES)
+RISK_LEVELS = ["Low", "Medium", "High"]
+
+
+def _compile_rule(rule):
+    """Precompute lookup structures for one category's rule."""
+    compiled = dict(rule)
+    if rule["match"] == "exact":
+        lookup = {}
+        for values, score in rule["rules"]:
+            for value in values:
+                lookup.setdefault(value, score)
+        compiled["lookup"] = lookup
+    elif rule["match"] == "numeric":
+        compiled["bounds"] = np.array([bound for bound, _ in rule["rules"]], dtype=float)
+        compiled["scores"] = np.array([score for _, score in rule["rules"]] + [rule["above"]])
+    return compiled
+
+
+COMPILED_RULES = {category: _compile_rule(rule) for category, rule in STATIC_RISK_RULES.items()}
+
+
+def score_risk_factor(category, value):
+    """Score a single static risk factor value."""
+    rule = COMPILED_RULES.get(category)
+    if rule is None:
+        return 0
+
+    if rule["match"] == "exact":
+        return rule["lookup"].get(value.lower(), rule["default"])
+
+    if rule["match"] == "contains":
+        lowered = value.lower()
+        for keywords, score in rule["rules"]:
+            if any(keyword in lowered for keyword in keywords):
+                return score
+        return rule["default"]
+
+    if rule["match"] == "numeric":
+        try:
+            size = float(value)
+        except ValueError:
+            return rule["default"]
+        for bound, score in rule["rules"]:
+            if size < bound:
+                return score
+        return rule["above"]
+
+    return 0
+
+
+def risk_level_for_score(score):
+    """Map a score to its High/Medium/Low level."""
+    if score >= HIGH_RISK_THRESHOLD:
+        return "High"
+    elif score >= MEDIUM_RISK_THRESHOLD:
+        return "Medium"
+    return "Low"
+
+
+def _risk_levels(scores):
+    """Vectorized risk_level_for_score as a categorical; NaN scores map to missing."""
+    codes = (scores >= MEDIUM_RISK_THRESHOLD).astype(np.int8) + (scores >= HIGH_RISK_THRESHOLD)
+    codes[np.isnan(scores)] = -1
+    return pd.Categorical.from_codes(codes, categories=RISK_LEVELS)
+
+
+def _score_column(category, column):
+    """Score one column, returning float scores with NaN where the factor is absent."""
+    rule = COMPILED_RULES[category]
+
+    # Numeric sizes can be scored directly without a Python call per value
+    if rule["match"] == "numeric" and pd.api.types.is_numeric_dtype(column) \
+            and not pd.api.types.is_bool_dtype(column):
+        values = column.to_numpy(dtype=float)
+        scores = rule["scores"][np.searchsorted(rule["bounds"], values, side="right")].astype(float)
+        scores[np.isnan(values) | (values == 0)] = np.nan
+        return scores
+
+    # Otherwise score each distinct value once and broadcast through the codes
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    unique_scores = np.array(
+        [score_risk_factor(category, value) if value else np.nan for value in uniques] + [np.nan],
+        dtype=float
+    )
+    return unique_scores[codes]
+
+
+def score_project_table(projects):
+    """Score static risk for many projects at once.
+
+    Accepts a DataFrame, a dict of columns or a list of project dicts. Missing
+    or empty values are skipped exactly as in the per-project path, so each
+    row's risk_score and risk_level match StaticRiskAgent.analyze_project_risks.
+    Returns a DataFrame with <category>_score and <category>_level columns plus
+    factor_count, risk_score and risk_level; level columns are categorical.
+    """
+    table = projects if isinstance(projects, pd.DataFrame) else pd.DataFrame(projects)
+    result = pd.DataFrame(index=table.index)
+
+    total = np.zeros(len(table))
+    count = np.zeros(len(table), dtype=int)
+
+    for category in STATIC_RISK_CATEGORIES:
+        if category not in table.columns:
+            continue
+
+        scores = _score_column(category, table[category])
+        present = ~np.isnan(scores)
+        total += np.where(present, scores, 0)
+        count += present
+
+        result[f"{category}_score"] = scores
+        result[f"{category}_level"] = _risk_levels(scores)
+
+    avg = np.divide(total, count, out=np.zeros(len(table)), where=count > 0)
+
+    # Rule scores are integers, so round through the few distinct (total, count) pairs
+    # to match round() exactly
+    max_factors = len(STATIC_RISK_CATEGORIES) + 1
+    pair_keys = total.astype(np.int64) * max_factors + count
+    rounded = np.zeros(pair_keys.max() + 1 if len(pair_keys) else 1)
+    for key in np.flatnonzero(np.bincount(pair_keys)):
+        pair_total, pair_count = divmod(int(key), max_factors)
+        rounded[key] = round(pair_total / pair_count, 2) if pair_count else 0
+
+    result["factor_count"] = count
+    result["risk_score"] = rounded[pair_keys]
+    result["risk_level"] = _risk_levels(avg)
+    return result
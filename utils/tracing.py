@@ -0,0 +1,271 @@
+"""Lightweight tracing spans, JSONL trace export and Prometheus-style metrics."""
+
+import atexit
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import TRACE_EXPORT_PATH, TRACE_EXPORT_MAX_BYTES, TRACE_BUFFER_SIZE, METRICS_PORT, METRICS_HOST
+
+# Upper bounds (seconds) of the span duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation with attributes, linked to its parent by trace and span ids."""
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._start = time.perf_counter()
+        self.duration = None
+
+    def elapsed(self):
+        """Return seconds since the span started."""
+        return time.perf_counter() - self._start
+
+    def set_attribute(self, key, value):
+        """Set an attribute; values should be str, int, float or bool."""
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        """Set several attributes at once."""
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        """Return the span in OpenTelemetry JSON field naming."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status
+        }
+
+
+class Metrics:
+    """In-process counters and span duration histograms, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)  # (name, labels) -> value
+        self._histograms = {}  # span name -> [bucket counts, count, sum]
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe_span(self, span_name, seconds):
+        """Record a span duration."""
+        with self._lock:
+            histogram = self._histograms.setdefault(span_name, [[0] * len(DURATION_BUCKETS), 0, 0.0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((name, [list(h[0]), h[1], h[2]]) for name, h in self._histograms.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            label_text = ",".join(f'{key}="{_escape_label(value_)}"' for key, value_ in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+
+        if histograms:
+            lines.append("# TYPE risk_span_duration_seconds histogram")
+        for span_name, (buckets, count, total) in histograms:
+            label = f'span="{_escape_label(span_name)}"'
+            for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f'risk_span_duration_seconds_bucket{{{label},le="{bound}"}} {bucket_count}')
+            lines.append(f'risk_span_duration_seconds_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"risk_span_duration_seconds_count{{{label}}} {count}")
+            lines.append(f"risk_span_duration_seconds_sum{{{label}}} {total:.6f}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Tracer:
+    """Create spans, keep recent ones in memory and append finished spans to a JSONL file."""
+
+    def __init__(self, export_path=TRACE_EXPORT_PATH, buffer_size=TRACE_BUFFER_SIZE, metrics=None,
+                 export_max_bytes=TRACE_EXPORT_MAX_BYTES):
+        """Initialize the tracer; an empty export_path disables file export.
+
+        The export file is written through a buffer and, once it reaches
+        export_max_bytes, renamed to <export_path>.1 (replacing the previous
+        one) and started afresh, so it never holds much more than twice that.
+        """
+        self.export_path = export_path
+        self.export_max_bytes = export_max_bytes
+        self.metrics = metrics or Metrics()
+        self._recent = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._export_file = None
+        self._export_size = 0
+        self._export_lock = threading.Lock()
+
+        if export_path:
+            directory = os.path.dirname(export_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            atexit.register(self.close)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the enclosed block as a child of the current span."""
+        span = Span(name, parent=_current_span.get(), attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "ERROR"
+            span.set_attribute("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    def start_span(self, name, **attributes):
+        """Start a span without making it current; finish it with end_span.
+
+        Use this where a context manager cannot be, e.g. around a generator
+        whose consumer runs between yields.
+        """
+        return Span(name, parent=_current_span.get(), attributes=attributes)
+
+    def end_span(self, span, error=None):
+        """Finish a span from start_span, marking it failed if error is given."""
+        if error is not None:
+            span.status = "ERROR"
+            span.set_attribute("error", f"{type(error).__name__}: {error}")
+        self._finish(span)
+
+    def _finish(self, span):
+        """Record a finished span."""
+        span.duration = span.elapsed()
+        span.end_ns = span.start_ns + int(span.duration * 1e9)
+        self.metrics.observe_span(span.name, span.duration)
+
+        with self._lock:
+            self._recent.append(span)
+        if self.export_path:
+            self._export(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def _export(self, line):
+        """Append a line to the export file, rotating it when it gets too big."""
+        with self._export_lock:
+            try:
+                if self._export_file is None:
+                    self._export_file = open(self.export_path, "a", encoding="utf-8")
+                    self._export_size = os.path.getsize(self.export_path)
+                self._export_file.write(line)
+                # Counted here since tell() would flush the buffer; json.dumps output is ASCII
+                self._export_size += len(line)
+                if self.export_max_bytes and self._export_size >= self.export_max_bytes:
+                    self._export_file.close()
+                    self._export_file = None
+                    os.replace(self.export_path, self.export_path + ".1")
+            except OSError as e:
+                print(f"Error exporting trace span: {e}")
+
+    def close(self):
+        """Flush and close the export file."""
+        with self._export_lock:
+            if self._export_file is not None:
+                self._export_file.close()
+                self._export_file = None
+
+    def get_trace(self, trace_id):
+        """Return the recent spans of a trace, ordered by start time."""
+        with self._lock:
+            spans = [span for span in self._recent if span.trace_id == trace_id]
+        return sorted(spans, key=lambda span: span.start_ns)
+
+
+def current_span():
+    """Return the active span, or None outside any span."""
+    return _current_span.get()
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Return the process-wide tracer."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def span(name, **attributes):
+    """Shorthand for get_tracer().span(name, **attributes)."""
+    return get_tracer().span(name, **attributes)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_tracer().metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server = None
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics on a background thread; does nothing if port is 0 or already started."""
+    global _metrics_server
+    with _tracer_lock:
+        if _metrics_server is not None or not port:
+            return _metrics_server
+        try:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"Could not start metrics server on port {port}: {e}")
+            return None
+        _metrics_server.daemon_threads = True
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+        return _metrics_server
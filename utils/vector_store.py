@@ -1,54 +1,106 @@
-"""ChromaDB utilities for managing vector storage."""
+"""Vector storage utilities backed by ChromaDB or a local memory-mapped index."""
 
 import os
+import time
+
 import chromadb
 import google.generativeai as genai
+import numpy as np
 from chromadb.api.types import Documents, EmbeddingFunction
-from config import CHROMA_DB_PATH, GEMINI_API_KEY
+from config import (
+    CHROMA_DB_PATH, EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_RETRIES, GEMINI_API_KEY,
+    LOCAL_VECTOR_INDEX_PATH, VECTOR_STORE_BACKEND
+)
+from utils.embedding_cache import EmbeddingCache, embedding_key
+from utils.llm_client import configure_genai
+from utils.local_vector_index import LocalCollection
+from utils.tracing import get_tracer, span
+
+class EmbeddingError(RuntimeError):
+    """Raised when embeddings cannot be generated after retrying."""
+
 
 class GoogleGenAIEmbeddingFunction(EmbeddingFunction):
     """Custom embedding function using Google's Generative AI."""
     
-    def __init__(self, api_key, model_name="models/embedding-001"):
+    def __init__(self, api_key, model_name="models/embedding-001", task_type="retrieval_document", cache=None):
         """Initialize with Google Generative AI API."""
         self.api_key = api_key
         self.model_name = model_name
-        genai.configure(api_key=api_key)
+        self.task_type = task_type
+        self.cache = cache or EmbeddingCache()
+        configure_genai(api_key)
+        
+    def _embed_batch(self, texts):
+        """Embed a batch of texts in one request, retrying with backoff on failure."""
+        for attempt in range(EMBEDDING_MAX_RETRIES):
+            try:
+                with span("embedding.batch", model=self.model_name, texts=len(texts),
+                          chars=sum(len(text) for text in texts), attempt=attempt + 1):
+                    result = genai.embed_content(
+                        model=self.model_name,
+                        content=texts,
+                        task_type=self.task_type,
+                    )
+                get_tracer().metrics.inc("risk_embedding_texts_total", len(texts), model=self.model_name)
+                return result["embedding"]
+            except Exception as e:
+                if attempt == EMBEDDING_MAX_RETRIES - 1:
+                    raise EmbeddingError(
+                        f"Failed to embed {len(texts)} texts after {EMBEDDING_MAX_RETRIES} attempts: {e}"
+                    ) from e
+                delay = 2 ** attempt
+                print(f"Error generating embeddings (attempt {attempt + 1}), retrying in {delay}s: {e}")
+                time.sleep(delay)
         
     def __call__(self, input: Documents) -> list:
         """Generate embeddings for the given input documents.
         
+        Texts already embedded (by content hash) are served from the cache; the
+        rest are sent in batches of EMBEDDING_BATCH_SIZE.
+        
         Args:
             input: List of text documents to generate embeddings for
             
         Returns:
             List of embeddings, one for each input document
+            
+        Raises:
+            EmbeddingError: If a batch still fails after retrying
         """
-        embeddings = []
+        # Ensure the text isn't too long for the API
+        texts = [text[:25000] for text in input]
+        keys = [embedding_key(self.model_name, self.task_type, text) for text in texts]
         
-        for text in input:
-            # Ensure the text isn't too long for the API
-            if len(text) > 25000:
-                text = text[:25000]
-                
-            # Get embedding from the Google API
-            try:
-                embedding_model = genai.get_embedding_model(self.model_name)
-                embedding = embedding_model.embed_content(
-                    content=text,
-                    task_type="retrieval_document",
-                )
-                embeddings.append(embedding["embedding"])
-            except Exception as e:
-                print(f"Error generating embedding: {e}")
-                # Return a zero vector as fallback
-                embeddings.append([0.0] * 768)  # Default dimension for embeddings
+        embeddings = self.cache.get_many(list(dict.fromkeys(keys)))
+        
+        # Embed each distinct uncached text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in embeddings:
+                missing.setdefault(key, text)
+        missing_keys = list(missing)
+        
+        for i in range(0, len(missing_keys), EMBEDDING_BATCH_SIZE):
+            batch_keys = missing_keys[i:i + EMBEDDING_BATCH_SIZE]
+            batch_embeddings = self._embed_batch([missing[key] for key in batch_keys])
+            
+            # Round through float32 so fresh and cached vectors are identical
+            batch_embeddings = [np.asarray(vector, dtype=np.float32).tolist() for vector in batch_embeddings]
+            self.cache.set_many(zip(batch_keys, batch_embeddings))
+            embeddings.update(zip(batch_keys, batch_embeddings))
                 
-        return embeddings
+        return [embeddings[key] for key in keys]
 
 class VectorStore:
-    def __init__(self, collection_name="project_risks"):
-        """Initialize the vector store with ChromaDB."""
+    def __init__(self, collection_name="project_risks", backend=VECTOR_STORE_BACKEND):
+        """Initialize the vector store with ChromaDB or the local index."""
+        self.backend = backend
+        
+        if backend == "local":
+            self.collection = LocalCollection(os.path.join(LOCAL_VECTOR_INDEX_PATH, collection_name))
+            return
+            
         # Ensure directory exists
         os.makedirs(CHROMA_DB_PATH, exist_ok=True)
         
@@ -74,11 +126,33 @@ class VectorStore:
             ids=[doc_id]
         )
         
-    def search(self, query, n_results=5):
-        """Search for similar documents in the vector store."""
+    def upsert_documents(self, doc_ids, texts, metadatas):
+        """Add or replace several documents in one call."""
+        self.collection.upsert(
+            documents=texts,
+            metadatas=metadatas,
+            ids=doc_ids
+        )
+        
+    def delete_documents(self, doc_ids):
+        """Delete documents by ID."""
+        if doc_ids:
+            self.collection.delete(ids=doc_ids)
+            
+    def get_content_hashes(self, project_id):
+        """Return {doc_id: content_hash} for every stored document of a project."""
+        results = self.collection.get(where={"project_id": project_id}, include=["metadatas"])
+        return {
+            doc_id: (metadata or {}).get("content_hash")
+            for doc_id, metadata in zip(results["ids"], results["metadatas"])
+        }
+        
+    def search(self, query, n_results=5, project_id=None):
+        """Search for similar documents in the vector store, optionally within one project."""
         results = self.collection.query(
             query_texts=[query],
-            n_results=n_results
+            n_results=n_results,
+            where={"project_id": project_id} if project_id is not None else None
         )
         return results
     